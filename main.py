@@ -1,26 +1,98 @@
-import src.algorithms.integrating as it
-import src.algorithms.cleaning as cl
-import src.algorithms.filtering as fl
-import src.algorithms.transforming as tr
-from pandas import DataFrame
+import argparse
+import os
+import sys
+
+# the algorithms (and pandas) are imported by the functions that use them, so that the command line starts fast
+
+
+# columns of the consolidated dataframe
+COLUMNS = ['ID', 'Time', 'Year', 'Course_Area', 'Unix_Time', 'Username', 'Component', 'Event_name', 'Event_code',
+           'Role', 'userid', 'courseid', 'Status']
+
+# columns read by each stage of the consolidation
+STAGE_COLUMNS = {'get_joined_logs': ['ID', 'Unix_Time', 'Event_name', 'Event_class', 'Event_component', 'Component'],
+                 'select_shard': ['Time', 'courseid'],
+                 'sample_logs': ['userid', 'courseid'],
+                 'add_course_shortname': ['courseid'],
+                 'add_year': ['Time'],
+                 'redefine_course_area': ['Event_code', 'Event_name', 'Event_component', 'courseid', 'Username',
+                                          'Affected_user'],
+                 'redefine_component': ['Event_code', 'Event_name', 'Event_component', 'Component', 'Event_context',
+                                        'Username', 'Affected_user', 'userid', 'relateduserid', 'courseid',
+                                        'Course_Area'],
+                 'add_role': ['courseid', 'userid', 'Unix_Time', 'Username', 'Course_Area'],
+                 'identify_deleted_modules': ['Event_context', 'courseid'],
+                 'make_timestamp_readable': ['Unix_Time'],
+                 'remove_deleted_users': ['userid'],
+                 'remove_automatic_events': ['Event_code', 'Role', 'Username', 'Origin']}
+
+# stages that run on the selected backend, the others run on pandas
+BACKEND_STAGES = ['add_course_shortname', 'add_year', 'redefine_course_area', 'redefine_component', 'add_role',
+                  'identify_deleted_modules']
+
+
+def get_required_columns(stages: [str], columns: [str]) -> [str]:
+    """
+    Return the columns needed by the given stages and by the output.
+
+    Args:
+        stages: The names of the stages still to run.
+        columns: The columns of the consolidated dataframe.
+
+    Returns:
+        The list of the required columns.
+    """
+
+    required_columns = list(columns)
+    for stage in stages:
+        required_columns += [column for column in STAGE_COLUMNS[stage] if column not in required_columns]
+
+    return required_columns
 
 
 def get_consolidated_data(database_data: str,
                           course_shortnames: str,
                           student_role: str,
-                          platform_logs: str = "",
+                          platform_logs: str or [str] = "",
                           teacher_role: str = "",
                           non_editing_teacher_role: str = "",
                           course_creator_role: str = "",
                           manager_role: str = "",
                           admin_role: str = "",
                           deleted_users: str = "",
-                          directory: str = "") -> DataFrame:
+                          directory: str = "",
+                          columns: [str] = None,
+                          checkpoint_dir: str = "",
+                          backend: str = 'pandas',
+                          sample: float = 1.0,
+                          sample_by: str = 'user',
+                          seed: int = 0,
+                          years: [int] = None,
+                          courses: [int] = None) -> 'DataFrame':
     """
     Get consolidated dataframe.
 
+    Only the columns needed by the consolidation stages and by the output are read from the logs (the wide
+    'Description' and 'IP address' fields are skipped, unless requested), and each column is dropped as soon as the
+    last stage that uses it has run.
+
+    If a checkpoint directory is given, the dataframe is saved there after each stage, so that an interrupted run
+    resumes from the last completed stage, provided that the inputs (their size and modification time) and the
+    parameters are unchanged; otherwise the run starts over. The checkpoints are removed once the run succeeds.
+
+    The integration stages (BACKEND_STAGES) evaluate the same rules on the selected backend: 'pandas', or 'polars' to
+    run them on a multi-threaded columnar engine, with identical results (see backends).
+
+    To develop and check rules quickly, a stratified sample of users (or courses) can be consolidated instead of the
+    whole data: all the logs of the selected users are kept, so that roles remain valid, and the 'Sample_weight' field
+    estimates the distributions of the full run (see sampling.sample_logs and sampling.estimate_distribution).
+
+    To consolidate a big instance in parts (e.g. in a batch, see batching.run_batch), the logs of some years or of a
+    range of course ids can be selected right after the join.
+
     Args:
-        platform_logs: The path to platform logs.
+        platform_logs: The path to platform logs, or the list of paths of several exports with overlapping date ranges,
+            which are merged and deduplicated.
         database_data: The path to database data.
         course_shortnames: The path to course shortnames.
         student_role: The path to students data.
@@ -31,77 +103,402 @@ def get_consolidated_data(database_data: str,
         admin_role: The path to admin data; optional.
         deleted_users: The path to deleted users data; optional.
         directory: The path to the directory containing logs extracted user by user.
+        columns: The columns of the consolidated dataframe; COLUMNS by default.
+        checkpoint_dir: The path of the directory where the checkpoints are saved; optional.
+        backend: The backend of the integration stages, 'pandas' or 'polars'.
+        sample: The fraction of users (or courses) to consolidate; 1 (all) by default.
+        sample_by: 'user' or 'course'; the unit of the sample.
+        seed: The seed of the sample.
+        years: The years of the logs to consolidate; all by default.
+        courses: The first and the last course ids of the logs to consolidate; all by default.
 
     Returns:
         The consolidated dataframe.
     """
 
-    # --------------------
-    # DATA INTEGRATION
-    # --------------------
-    # collect users data if extracted user by user
-    if directory != '':
-        platform_logs = it.collect_user_logs(directory)
-    # join the platform and the database data
-    log_data = it.get_joined_logs(platform_logs, database_data)
-    # add course shortnames
-    log_data = it.add_course_shortname(log_data, course_shortnames)
-    # add year to platform logs
-    log_data = it.add_year(log_data)
-    # add the area to platform logs
-    log_data = it.redefine_course_area(log_data)
-    # redefine components
-    log_data = it.redefine_component(log_data)
-    # add roles
-    log_data = it.add_role(log_data, student_role, teacher_role, non_editing_teacher_role,
-                           course_creator_role, manager_role, admin_role)
-    # identify actions on deleted modules
-    log_data = it.identify_deleted_modules(log_data)
+    import src.algorithms.backends as bk
+    import src.algorithms.batching as bt
+    import src.algorithms.checkpointing as cp
+    import src.algorithms.cleaning as cl
+    import src.algorithms.integrating as it
+    import src.algorithms.loading as ld
+    import src.algorithms.sampling as sp
+    import src.algorithms.transforming as tr
+
+    if columns is None:
+        columns = COLUMNS
+    if sample < 1 and 'Sample_weight' not in columns:
+        columns = list(columns) + ['Sample_weight']
+    backend = bk.get_backend(backend)
+
+    paths = {'platform_logs': platform_logs if directory == '' else '',
+             'database_data': database_data,
+             'course_shortnames': course_shortnames,
+             'student_role': student_role,
+             'teacher_role': teacher_role,
+             'non_editing_teacher_role': non_editing_teacher_role,
+             'course_creator_role': course_creator_role,
+             'manager_role': manager_role,
+             'admin_role': admin_role,
+             'deleted_users': deleted_users,
+             'directory': directory}
 
     # --------------------
-    # DATA TRANSFORMATION
+    # CHECKPOINT LOADING
     # --------------------
-    # convert the timestamps to human-readable format
-    log_data = tr.make_timestamp_readable(log_data)
+    # resume from the last completed stage if the inputs and the parameters are unchanged
+    log_data, completed_stage, fingerprint = None, None, None
+    if checkpoint_dir != '':
+        fingerprint = cp.get_fingerprint(paths, {'columns': columns, 'sample': sample, 'sample_by': sample_by,
+                                                 'seed': seed, 'years': years, 'courses': courses})
+        checkpoint = cp.load_checkpoint(checkpoint_dir, fingerprint)
+        if checkpoint is not None:
+            completed_stage, log_data = checkpoint
+            # the logs are already joined
+            paths.update(platform_logs='', database_data='', directory='')
 
     # --------------------
-    # DATA CLEANING
+    # DATA LOADING
     # --------------------
-    # remove deleted users if any
-    log_data = cl.remove_deleted_users(log_data, deleted_users)
-    # remove automatic events
-    log_data = cl.remove_automatic_events(log_data)
+    # read all the inputs concurrently (users data are collected from the directory if extracted user by user), and
+    # only the columns needed by the consolidation
+    inputs = ld.load_inputs(columns=get_required_columns(STAGE_COLUMNS, columns), **paths)
+    if paths['directory'] != '':
+        inputs['platform_logs'] = inputs.pop('directory')
+
+    # consolidation stages, in execution order
+    stages = [
+        # --------------------
+        # DATA INTEGRATION
+        # --------------------
+        # join the platform and the database data
+        ('get_joined_logs', lambda df: it.get_joined_logs(inputs.pop('platform_logs'), inputs.pop('database_data'))),
+        # select the logs of some years or courses, if requested
+        ('select_shard', lambda df: bt.select_shard(df, years, courses) if years is not None or courses is not None
+         else df),
+        # select a stratified sample of users or courses, if requested
+        ('sample_logs', lambda df: sp.sample_logs(df, sample, sample_by, seed) if sample < 1 else df),
+        # add course shortnames
+        ('add_course_shortname', lambda df: it.add_course_shortname(df, inputs['course_shortnames'])),
+        # add year to platform logs
+        ('add_year', it.add_year),
+        # add the area to platform logs
+        ('redefine_course_area', it.redefine_course_area),
+        # redefine components
+        ('redefine_component', it.redefine_component),
+        # add roles
+        ('add_role', lambda df: it.add_role(df, inputs['student_role'], inputs.get('teacher_role', ''),
+                                            inputs.get('non_editing_teacher_role', ''),
+                                            inputs.get('course_creator_role', ''), inputs.get('manager_role', ''),
+                                            inputs.get('admin_role', ''))),
+        # identify actions on deleted modules
+        ('identify_deleted_modules', it.identify_deleted_modules),
+
+        # --------------------
+        # DATA TRANSFORMATION
+        # --------------------
+        # convert the timestamps to human-readable format
+        ('make_timestamp_readable', tr.make_timestamp_readable),
+
+        # --------------------
+        # DATA CLEANING
+        # --------------------
+        # remove deleted users if any
+        ('remove_deleted_users', lambda df: cl.remove_deleted_users(df, inputs.get('deleted_users', ''))),
+        # remove automatic events
+        ('remove_automatic_events', cl.remove_automatic_events)
+    ]
+
+    stage_names = [name for name, _ in stages]
+    first_stage = 0 if completed_stage is None else stage_names.index(completed_stage) + 1
+    for idx, (stage_name, stage) in enumerate(stages[first_stage:], first_stage):
+        if log_data is not None:
+            log_data = bk.convert(log_data, backend if stage_name in BACKEND_STAGES else bk.get_backend('pandas'))
+        log_data = stage(log_data)
+        # drop the columns whose last consumer has run
+        log_data = tr.drop_unused_columns(log_data, get_required_columns(stage_names[idx + 1:], columns))
+        if checkpoint_dir != '':
+            cp.save_checkpoint(checkpoint_dir, fingerprint, stage_name, bk.convert(log_data, bk.get_backend('pandas')))
 
     # --------------------
     # DATA SELECTION
     # --------------------
     # select and reorder columns
-    COLUMNS = ['ID', 'Time', 'Year', 'Course_Area', 'Unix_Time', 'Username', 'Component', 'Event_name', 'Role',
-               'userid', 'courseid', 'Status']
+    log_data = log_data[columns].copy()
 
-    # drop unused columns
-    log_data = log_data[COLUMNS].copy()
+    if checkpoint_dir != '':
+        cp.remove_checkpoints(checkpoint_dir, stage_names)
 
     return log_data
 
 
-if __name__ == '__main__':
+# commands of the command line, the first one being run when no command is given
+COMMANDS = ['consolidate', 'batch', 'extract', 'serve']
+
+# output formats of the command line
+FORMATS = ['csv', 'store', 'sqlite', 'duckdb']
+
+# estimated distributions reported by the command line when consolidating a sample, and their number of rows
+SAMPLE_REPORT_COLUMNS = ['Year', 'Course_Area', 'Component', 'Role']
+SAMPLE_REPORT_ROWS = 20
+
+
+def save_data(df: 'DataFrame', output: str, data_format: str = 'csv', table: str = 'logs'):
+    """
+    Save the consolidated (or extracted) dataframe.
+
+    Args:
+        df: The dataframe object.
+        output: The path of the output file (of the directory for the store format).
+        data_format: 'csv', 'store' (see storing.write_store), 'sqlite' or 'duckdb' (see exporting.export_to_database).
+        table: The name of the table, for the database formats.
+    """
+
+    if data_format == 'csv':
+        df.to_csv(output)
+    elif data_format == 'store':
+        from src.algorithms.storing import write_store
+        write_store(df, output)
+    elif data_format in ['sqlite', 'duckdb']:
+        from src.algorithms.exporting import export_to_database
+        export_to_database(df, output, table=table, engine=data_format)
+    else:
+        raise ValueError(f"Unknown format: {data_format}")
+
+
+def run_job(job: dict) -> dict:
+    """
+    Run a job of a batch (see batching.read_manifest): consolidate its inputs (the logs of its years or courses, if
+    split) and save the output.
+
+    Args:
+        job: The job.
+
+    Returns:
+        The number of consolidated logs ('rows') and the output path.
+    """
 
-    from src.paths import *
+    df = get_consolidated_data(**job['inputs'], **job['parameters'], years=job['years'], courses=job['courses'])
+    if os.path.dirname(job['output']) != '':
+        os.makedirs(os.path.dirname(job['output']), exist_ok=True)
+    save_data(df, job['output'], job['format'], job['table'])
 
-    # get the consolidated dataframe
-    df = get_consolidated_data(platform_logs=PLATFORM_LOGS_PATH,
-                               database_data=DATABASE_DATA_PATH,
-                               course_shortnames=COURSE_SHORTNAMES_PATH,
-                               student_role=STUDENT_ROLE_PATH,
-                               teacher_role=TEACHER_ROLE_PATH,
-                               non_editing_teacher_role=NON_EDITING_TEACHER_ROLE_PATH,
-                               manager_role=MANAGER_ROLE_PATH,
-                               admin_role=ADMIN_ROLE_PATH,
-                               deleted_users=DELETED_USERS_PATH)
+    return {'rows': len(df), 'output': job['output']}
 
-    # remove useless data from the entire dataset
-    # df = fl.filter_dataset_records(df)
 
-    # you can save the dataset for further analysis
-    df.to_csv('src/datasets/consolidated_df.csv')
+def _input_path(path: str) -> str:
+    """
+    Check that an input file or directory exists.
+    """
+
+    if path != '' and not os.path.exists(path):
+        raise argparse.ArgumentTypeError(f"no such file or directory: '{path}'")
+
+    return path
+
+
+def _fraction(value: str) -> float:
+    """
+    Check that a sample fraction is between 0 and 1.
+    """
+
+    try:
+        fraction = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid fraction: '{value}'")
+    if not 0 < fraction <= 1:
+        raise argparse.ArgumentTypeError(f"the fraction must be between 0 and 1: '{value}'")
+
+    return fraction
+
+
+def _dataset(dataset: str) -> (str, str):
+    """
+    Split a NAME=PATH dataset argument.
+    """
+
+    name, separator, path = dataset.partition('=')
+    if separator == '' or name == '':
+        raise argparse.ArgumentTypeError(f"expected NAME=PATH: '{dataset}'")
+
+    return name, _input_path(path)
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """
+    Return the parser of the command line. The default input paths are those of src/paths.py.
+    """
+
+    import src.paths as paths
+
+    parser = argparse.ArgumentParser(description="Consolidate Moodle logs, extract records and serve them.")
+    commands = parser.add_subparsers(dest='command', metavar='command',
+                                     help="consolidate (default), batch, extract or serve; see COMMAND --help")
+
+    # consolidate
+    consolidate_parser = commands.add_parser('consolidate', help="consolidate the platform logs and the database data")
+    inputs = consolidate_parser.add_argument_group('inputs')
+    inputs.add_argument('--platform-logs', nargs='+', type=_input_path, default=paths.PLATFORM_LOGS_PATH,
+                        metavar='PATH', help="the platform logs, or several exports with overlapping date ranges")
+    inputs.add_argument('--directory', type=_input_path, default='', metavar='PATH',
+                        help="the directory of the logs extracted user by user, instead of the platform logs")
+    for name, path in [('database-data', paths.DATABASE_DATA_PATH),
+                       ('course-shortnames', paths.COURSE_SHORTNAMES_PATH),
+                       ('student-role', paths.STUDENT_ROLE_PATH),
+                       ('teacher-role', paths.TEACHER_ROLE_PATH),
+                       ('non-editing-teacher-role', paths.NON_EDITING_TEACHER_ROLE_PATH),
+                       ('course-creator-role', paths.COURSE_CREATOR_ROLE_PATH),
+                       ('manager-role', paths.MANAGER_ROLE_PATH),
+                       ('admin-role', paths.ADMIN_ROLE_PATH),
+                       ('deleted-users', paths.DELETED_USERS_PATH)]:
+        inputs.add_argument('--' + name, type=_input_path, default=path, metavar='PATH',
+                            help=f"default: '{path}'" if path != '' else "optional")
+    stages = consolidate_parser.add_argument_group('stages')
+    stages.add_argument('--columns', nargs='+', default=None, metavar='COLUMN',
+                        help="the columns of the consolidated data; default: " + ' '.join(COLUMNS))
+    stages.add_argument('--backend', choices=['pandas', 'polars'], default='pandas',
+                        help="the backend of the integration stages")
+    stages.add_argument('--checkpoint-dir', default='', metavar='PATH',
+                        help="save a checkpoint after each stage, and resume an interrupted run")
+    stages.add_argument('--filter', action='store_true', help="remove useless data from the entire dataset")
+    stages.add_argument('--sample', type=_fraction, default=1.0, metavar='FRACTION',
+                        help="consolidate a stratified sample of users (or courses) and print the estimated "
+                             "distributions of the full run")
+    stages.add_argument('--sample-by', choices=['user', 'course'], default='user', help="the unit of the sample")
+    stages.add_argument('--seed', type=int, default=0, help="the seed of the sample")
+
+    # batch
+    batch_parser = commands.add_parser('batch', help="run a batch of consolidations with several workers, on one or "
+                                                     "several machines sharing a filesystem")
+    batch_parser.add_argument('manifest', type=_input_path, help="the JSON manifest of the jobs")
+    batch_parser.add_argument('--queue', default='', metavar='PATH',
+                              help="the directory of the work queue, shared by the machines; default: the manifest "
+                                   "path with the '_queue' suffix")
+    batch_parser.add_argument('--processes', type=int, default=1, help="the number of worker processes")
+    batch_parser.add_argument('--max-attempts', type=int, default=3, help="the number of attempts of a job")
+    batch_parser.add_argument('--stale-timeout', type=float, default=600, metavar='SECONDS',
+                              help="the age of the lock of a running job after which its worker is considered dead")
+    batch_parser.add_argument('--status', action='store_true', help="print the progress of the batch and exit")
+
+    # extract
+    extract_parser = commands.add_parser('extract', help="extract records from consolidated data")
+    extract_parser.add_argument('input', type=_input_path,
+                                help="the consolidated data: a CSV file or a store directory")
+    extract_parser.add_argument('--year', nargs='+', type=int, metavar='YEAR')
+    extract_parser.add_argument('--course-area', nargs='+', metavar='COURSE_AREA')
+    extract_parser.add_argument('--role', nargs='+', metavar='ROLE')
+    extract_parser.add_argument('--username', nargs='+', metavar='USERNAME')
+    extract_parser.add_argument('--course-dates', type=_input_path, default='', metavar='PATH',
+                                help="keep only the logs within the course dates")
+
+    # output of consolidate and extract
+    for command_parser, output in [(consolidate_parser, 'src/datasets/consolidated_df.csv'),
+                                   (extract_parser, 'extracted_df.csv')]:
+        outputs = command_parser.add_argument_group('output')
+        outputs.add_argument('--output', '-o', default=output, metavar='PATH', help=f"default: '{output}'")
+        outputs.add_argument('--format', choices=FORMATS, default='csv', help="default: csv")
+        outputs.add_argument('--table', default='logs', help="the table name of the database formats")
+
+    # serve
+    serve_parser = commands.add_parser('serve', help="serve consolidated data through a local query service")
+    serve_parser.add_argument('datasets', nargs='+', type=_dataset, metavar='NAME=PATH',
+                              help="the datasets: consolidated CSV files or store directories")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+
+    return parser
+
+
+def main(argv: [str] = None) -> int:
+    """
+    Run the command line, e.g.:
+        python main.py consolidate --platform-logs logs.csv.gz --database-data db.csv -o consolidated.sqlite
+            --format sqlite
+        python main.py batch instances.json --processes 4
+        python main.py extract consolidated_df.csv --year 2023 --course-area "Course A" -o course_A.csv
+        python main.py serve 2023=consolidated_df.csv --port 8000
+    Without a command, the consolidation runs with the given options (e.g. python main.py --sample 0.5), by default on
+    the paths of src/paths.py.
+
+    Args:
+        argv: The arguments; those of the command line by default.
+
+    Returns:
+        The exit status.
+    """
+
+    parser = get_parser()
+    argv = list(argv if argv is not None else sys.argv[1:])
+    # the command is detected before parsing, since the options of the consolidation are unknown without it
+    if len(argv) == 0 or (argv[0] not in COMMANDS and argv[0] not in ['-h', '--help']):
+        argv = [COMMANDS[0]] + argv
+    arguments = parser.parse_args(argv)
+
+    if arguments.command == 'consolidate':
+        platform_logs = arguments.platform_logs
+        if isinstance(platform_logs, list) and len(platform_logs) == 1:
+            platform_logs = platform_logs[0]
+        df = get_consolidated_data(platform_logs=platform_logs,
+                                   database_data=arguments.database_data,
+                                   course_shortnames=arguments.course_shortnames,
+                                   student_role=arguments.student_role,
+                                   teacher_role=arguments.teacher_role,
+                                   non_editing_teacher_role=arguments.non_editing_teacher_role,
+                                   course_creator_role=arguments.course_creator_role,
+                                   manager_role=arguments.manager_role,
+                                   admin_role=arguments.admin_role,
+                                   deleted_users=arguments.deleted_users,
+                                   directory=arguments.directory,
+                                   columns=arguments.columns,
+                                   checkpoint_dir=arguments.checkpoint_dir,
+                                   backend=arguments.backend,
+                                   sample=arguments.sample,
+                                   sample_by=arguments.sample_by,
+                                   seed=arguments.seed)
+        if arguments.filter:
+            # remove useless data from the entire dataset
+            import src.algorithms.filtering as fl
+            df = fl.filter_dataset_records(df)
+        if arguments.sample < 1:
+            # report the estimated distributions of the full run
+            from src.algorithms.sampling import estimate_distribution
+            for column in SAMPLE_REPORT_COLUMNS:
+                if column in df.columns:
+                    print(estimate_distribution(df, column).head(SAMPLE_REPORT_ROWS).to_string(), end='\n\n')
+        save_data(df, arguments.output, arguments.format, arguments.table)
+
+    elif arguments.command == 'batch':
+        import src.algorithms.batching as bt
+        jobs = bt.read_manifest(arguments.manifest)
+        queue_dir = arguments.queue if arguments.queue != '' else os.path.splitext(arguments.manifest)[0] + '_queue'
+        if arguments.status:
+            progress = bt.get_progress(queue_dir, jobs)
+        else:
+            progress = bt.run_batch(jobs, queue_dir, run_job, arguments.processes, arguments.max_attempts,
+                                    stale_timeout=arguments.stale_timeout)
+        print(progress.to_string())
+        if (progress['state'] == 'failed').any():
+            return 1
+
+    elif arguments.command == 'extract':
+        from src.algorithms.extracting import extract_records
+        from src.algorithms.loading import read_consolidated_data
+        from src.classes.records import Records
+        if os.path.isdir(arguments.input):
+            records = Records.from_store(arguments.input)
+        else:
+            records = Records(read_consolidated_data(arguments.input))
+        records = extract_records(records, year=arguments.year, course_area=arguments.course_area,
+                                  role=arguments.role, username=arguments.username,
+                                  course_dates=arguments.course_dates)
+        save_data(records.get_df(), arguments.output, arguments.format, arguments.table)
+
+    elif arguments.command == 'serve':
+        from src.algorithms.serving import serve_records
+        serve_records(dict(arguments.datasets), arguments.host, arguments.port)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,30 @@
-__all__ = ["Records", "cleaning", "extracting", "filtering", "integrating", "timing", "transforming"]
-
-from src.classes.records import Records
-from .cleaning import *
-from .extracting import *
-from .filtering import *
-from .integrating import *
-from .timing import *
-from .transforming import *
+__all__ = ["IndexedRecords", "Records", "backends", "batching", "checkpointing", "cleaning", "encoding", "exporting",
+           "extracting", "filtering", "integrating", "loading", "sampling", "sequencing", "serving", "sketching",
+           "storing", "timing", "transforming"]
+
+import importlib
+
+# the modules (and their functions) are imported on first access, so that importing the package does not load pandas
+_MODULES = ["backends", "batching", "checkpointing", "cleaning", "encoding", "exporting", "extracting", "filtering",
+            "integrating", "loading", "sampling", "sequencing", "serving", "sketching", "storing", "timing",
+            "transforming"]
+_CLASSES = {"IndexedRecords": "src.classes.indexed_records", "Records": "src.classes.records"}
+
+
+def __getattr__(name: str):
+    if name in _CLASSES:
+        return getattr(importlib.import_module(_CLASSES[name]), name)
+    if name in _MODULES:
+        return importlib.import_module('.' + name, __name__)
+    if not name.startswith('_'):
+        # a function of a module, e.g. get_joined_logs; the last module defining it wins, as with star imports
+        for module_name in reversed(_MODULES):
+            module = importlib.import_module('.' + module_name, __name__)
+            if hasattr(module, name):
+                return getattr(module, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> [str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,428 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+
+# The value-assignment rules of the consolidation stages are declared as tables (see integrating.COURSE_AREA_RULES) and
+# evaluated by a backend, so that the same rules can run on pandas or on a multi-threaded columnar engine.
+#
+# A rule is a tuple (value, conditions): the value is assigned to the target column of the rows that meet all the
+# conditions, and the rules are applied in order, so that a later rule overrides an earlier one. The value is either a
+# constant or a tuple (column, operator, argument) that derives it from another column of the row:
+#     (column, 'prefix', separator): the part of the column before the separator;
+#     (column, 'map', mapping): the value of the mapping for the column.
+# A condition is either a boolean array or a tuple (column, operator, argument):
+#     (column, 'in', values), (column, 'not in', values): the column takes one of the values (or none of them);
+#     (column, '==', value), (column, '!=', value): the column is equal (not equal) to a constant;
+#     (column, '== column', other), (column, '!= column', other): the column is equal (not equal) to another column;
+#     (column, 'contains', pattern), (column, 'not contains', pattern): the column matches (does not match) the regular
+#         expression;
+#     (column, 'null', None): the column is missing.
+# A condition can also be a list of alternatives, each a list of conditions: it is met if all the conditions of any
+# alternative are met.
+# Comparisons follow the pandas semantics: missing values are equal to nothing and different from everything.
+
+
+def get_years(times: pd.Series) -> pd.Series:
+    """
+    Return the years of the times of the platform logs ('dd/mm/yy, HH:MM').
+    """
+
+    return times.map(lambda x: int(x.split('/')[2].split(',')[0]) + 2000)
+
+
+def _is_derived(value) -> bool:
+    """
+    Return True if the value of a rule is derived from a column.
+    """
+
+    return isinstance(value, tuple)
+
+
+def _get_cost(condition) -> int:
+    """
+    Return the relative cost of a condition: 0 for the comparisons, 1 for the alternatives, 2 for the regular
+    expressions.
+    """
+
+    if isinstance(condition, list):
+        return 1
+    if isinstance(condition, tuple) and condition[1] in ['contains', 'not contains']:
+        return 2
+
+    return 0
+
+
+def _get_rule_columns(rule: tuple) -> set:
+    """
+    Return the columns read by a rule.
+    """
+
+    value, conditions = rule
+    # the conditions of the alternatives
+    conditions = [condition for condition in conditions if not isinstance(condition, list)] + \
+                 [alternative_condition for condition in conditions if isinstance(condition, list)
+                  for alternative in condition for alternative_condition in alternative]
+    columns = {condition[0] for condition in conditions if isinstance(condition, tuple)}
+    columns |= {condition[2] for condition in conditions if isinstance(condition, tuple) and
+                condition[1] in ['== column', '!= column']}
+    if _is_derived(value):
+        columns.add(value[0])
+
+    return columns
+
+
+class PandasBackend(object):
+    """
+    Evaluate the consolidation stages on pandas dataframes, in place.
+    """
+
+    name = 'pandas'
+
+    def from_pandas(self, df: DataFrame) -> DataFrame:
+        return df
+
+    def to_pandas(self, df: DataFrame) -> DataFrame:
+        return df
+
+    def get_array(self, df: DataFrame, column: str) -> np.ndarray:
+        """
+        Return the values of the column
+        """
+        return df[column].to_numpy()
+
+    def set_column(self, df: DataFrame, column: str, values: np.ndarray) -> DataFrame:
+        """
+        Set the values of the column
+        """
+        df[column] = values
+
+        return df
+
+    def drop_columns(self, df: DataFrame, columns: [str]) -> DataFrame:
+        """
+        Drop the columns
+        """
+        df.drop(columns=columns, inplace=True)
+
+        return df
+
+    def set_year(self, df: DataFrame, column: str, source: str) -> DataFrame:
+        """
+        Set the column to the years of the times of the source column (see get_years)
+        """
+        df[column] = get_years(df[source]).to_numpy('int64')
+
+        return df
+
+    def _get_mask(self, df: DataFrame, condition) -> np.ndarray or pd.Series:
+        if not isinstance(condition, tuple):
+            return condition
+
+        column, operator, argument = condition
+        if operator == 'in':
+            return df[column].isin(argument)
+        if operator == 'not in':
+            return ~df[column].isin(argument)
+        if operator == '==':
+            return df[column] == argument
+        if operator == '!=':
+            return df[column] != argument
+        if operator == '== column':
+            return df[column] == df[argument]
+        if operator == '!= column':
+            return df[column] != df[argument]
+        if operator == 'contains':
+            return df[column].str.contains(argument, na=False)
+        if operator == 'not contains':
+            return ~df[column].str.contains(argument, na=False)
+        if operator == 'null':
+            return df[column].isnull()
+
+        raise ValueError(f"Unknown operator: {operator}")
+
+    def _get_conditions_mask(self, df: DataFrame, conditions: list, mask: np.ndarray = None) -> np.ndarray:
+        """
+        Return the mask of the rows that meet all the conditions (and the given mask). The conditions are evaluated
+        from the cheapest to the most expensive one, and the alternatives and the regular expressions only on the rows
+        that meet the previous conditions (e.g. the event names are only matched on the rows of unknown events).
+        """
+        mask = np.ones(len(df), dtype=bool) if mask is None else mask.copy()
+        for condition in sorted(conditions, key=_get_cost):
+            if isinstance(condition, list):
+                # any of the alternatives
+                alternatives_mask = np.zeros(len(df), dtype=bool)
+                for alternative in condition:
+                    alternatives_mask |= self._get_conditions_mask(df, alternative, mask)
+                mask = alternatives_mask
+            elif _get_cost(condition) == 2:
+                column, operator, pattern = condition
+                rows = np.flatnonzero(mask)
+                matches = df[column].iloc[rows].str.contains(pattern, na=False).to_numpy(dtype=bool)
+                mask[rows] = matches if operator == 'contains' else ~matches
+            else:
+                mask &= np.asarray(self._get_mask(df, condition), dtype=bool)
+
+        return mask
+
+    def apply_rules(self, df: DataFrame, column: str, rules: [tuple]) -> DataFrame:
+        """
+        Assign the values of the rules to the column (see the description of the rules at the top of the module)
+        """
+        if column not in df.columns:
+            # created beforehand, since a masked assignment cannot create a column in an empty dataframe
+            df[column] = pd.Series(np.nan, index=df.index, dtype=object)
+
+        for value, conditions in rules:
+            mask = self._get_conditions_mask(df, conditions)
+            if _is_derived(value):
+                source, operator, argument = value
+                if operator == 'prefix':
+                    df.loc[mask, column] = df.loc[mask, source].str.split(argument).str[0]
+                elif operator == 'map':
+                    df.loc[mask, column] = df.loc[mask, source].map(argument)
+                else:
+                    raise ValueError(f"Unknown operator: {operator}")
+            else:
+                df.loc[mask, column] = value
+
+        return df
+
+    def swap_values(self, df: DataFrame, conditions: list, column_pairs: [(str, str)]) -> DataFrame:
+        """
+        Swap the values of the pairs of columns in the rows that meet all the conditions
+        """
+        mask = self._get_conditions_mask(df, conditions)
+        for first, second in column_pairs:
+            df.loc[mask, [first, second]] = df.loc[mask, [second, first]].values
+
+        return df
+
+    def to_integer(self, df: DataFrame, columns: [str]) -> DataFrame:
+        """
+        Convert the columns to 64-bit integers, rounding down
+        """
+        for column in columns:
+            df[column] = np.floor(pd.to_numeric(df[column], errors='coerce')).astype('int64')
+
+        return df
+
+
+class PolarsBackend(object):
+    """
+    Evaluate the consolidation stages on Polars dataframes: each group of rules is compiled into a single expression,
+    and the independent expressions are evaluated in parallel on all the cores.
+    """
+
+    name = 'polars'
+
+    def from_pandas(self, df: DataFrame) -> 'pl.DataFrame':
+        # converted column by column, so that pyarrow is not required: the numeric columns are copied at once, but the
+        # string columns go through Python objects, which costs about as much as a rule stage on pandas (see the README)
+        columns = []
+        for column in df.columns:
+            values = df[column]
+            if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biuf':
+                columns.append(pl.Series(column, values.to_numpy()))
+            else:
+                present = values.notnull()
+                values = values.astype(object).where(present, None)
+                # the type of an empty or missing column cannot be inferred: it is a text column
+                columns.append(pl.Series(column, values.tolist(), strict=False) if present.any()
+                               else pl.Series(column, values.tolist(), dtype=pl.String))
+
+        return pl.DataFrame(columns)
+
+    def to_pandas(self, df: 'pl.DataFrame') -> DataFrame:
+        columns = {}
+        for column in df.columns:
+            values = df[column]
+            if values.dtype.is_numeric() or values.dtype == pl.Boolean:
+                columns[column] = values.to_numpy()
+            else:
+                # missing values are NaN, as in pandas
+                array = values.to_numpy().astype(object)
+                array[values.is_null().to_numpy()] = np.nan
+                columns[column] = array
+
+        return pd.DataFrame(columns, columns=df.columns)
+
+    def get_array(self, df: 'pl.DataFrame', column: str) -> np.ndarray:
+        """
+        Return the values of the column
+        """
+        return df[column].to_numpy()
+
+    def set_column(self, df: 'pl.DataFrame', column: str, values: np.ndarray) -> 'pl.DataFrame':
+        """
+        Set the values of the column
+        """
+        return df.with_columns(pl.Series(column, values))
+
+    def drop_columns(self, df: 'pl.DataFrame', columns: [str]) -> 'pl.DataFrame':
+        """
+        Drop the columns
+        """
+        return df.drop(columns)
+
+    def set_year(self, df: 'pl.DataFrame', column: str, source: str) -> 'pl.DataFrame':
+        """
+        Set the column to the years of the times of the source column (see get_years)
+        """
+        year = pl.col(source).str.split('/').list.get(2).str.split(',').list.first().str.strip_chars()
+
+        return df.with_columns((year.cast(pl.Int64) + 2000).alias(column))
+
+    def _get_condition(self, condition) -> 'pl.Expr':
+        if isinstance(condition, list):
+            # any of the alternatives
+            return pl.any_horizontal([pl.all_horizontal([self._get_condition(alternative_condition)
+                                                         for alternative_condition in alternative])
+                                      for alternative in condition])
+        if not isinstance(condition, tuple):
+            return pl.lit(pl.Series(condition))
+
+        column, operator, argument = condition
+        if operator in ['in', 'not in']:
+            values = np.asarray(argument).tolist()
+            expression = pl.col(column).is_in(values).fill_null(False) if len(values) > 0 else pl.lit(False)
+            return expression if operator == 'in' else ~expression
+        if operator == '==':
+            return pl.col(column).eq(argument).fill_null(False)
+        if operator == '!=':
+            return pl.col(column).ne(argument).fill_null(True)
+        if operator == '== column':
+            return pl.col(column).eq(pl.col(argument)).fill_null(False)
+        if operator == '!= column':
+            return pl.col(column).ne(pl.col(argument)).fill_null(True)
+        if operator == 'contains':
+            return pl.col(column).str.contains(argument).fill_null(False)
+        if operator == 'not contains':
+            return ~pl.col(column).str.contains(argument).fill_null(False)
+        if operator == 'null':
+            return pl.col(column).is_null()
+
+        raise ValueError(f"Unknown operator: {operator}")
+
+    def _get_value(self, value) -> 'pl.Expr':
+        if not _is_derived(value):
+            return pl.lit(value)
+
+        source, operator, argument = value
+        if operator == 'prefix':
+            return pl.col(source).str.split(argument).list.first()
+        if operator == 'map':
+            return pl.col(source).replace_strict(list(argument), list(argument.values()), default=None)
+
+        raise ValueError(f"Unknown operator: {operator}")
+
+    def apply_rules(self, df: 'pl.DataFrame', column: str, rules: [tuple]) -> 'pl.DataFrame':
+        """
+        Assign the values of the rules to the column (see the description of the rules at the top of the module)
+        """
+        if column not in df.columns:
+            df = df.with_columns(pl.lit(None, dtype=pl.String).alias(column))
+        elif df.schema[column] == pl.Null:
+            df = df.with_columns(pl.col(column).cast(pl.String))
+
+        # the rules that follow a rule reading the column, up to the next one, do not depend on each other: they are
+        # chained in a single expression where the last matching rule wins
+        groups = []
+        for rule in rules:
+            if len(groups) == 0 or column in _get_rule_columns(rule):
+                groups.append([])
+            groups[-1].append(rule)
+
+        query = df.lazy()
+        for group in groups:
+            expression = None
+            for value, conditions in reversed(group):
+                condition = pl.all_horizontal([self._get_condition(condition) for condition in conditions])
+                expression = (pl.when(condition) if expression is None
+                              else expression.when(condition)).then(self._get_value(value))
+            query = query.with_columns(expression.otherwise(pl.col(column)).cast(df.schema[column]).alias(column))
+
+        return query.collect()
+
+    def swap_values(self, df: 'pl.DataFrame', conditions: list, column_pairs: [(str, str)]) -> 'pl.DataFrame':
+        """
+        Swap the values of the pairs of columns in the rows that meet all the conditions
+        """
+        mask = pl.all_horizontal([self._get_condition(condition) for condition in conditions])
+        expressions = []
+        for first, second in column_pairs:
+            expressions += [pl.when(mask).then(pl.col(second)).otherwise(pl.col(first)).alias(first),
+                            pl.when(mask).then(pl.col(first)).otherwise(pl.col(second)).alias(second)]
+
+        return df.with_columns(expressions)
+
+    def to_integer(self, df: 'pl.DataFrame', columns: [str]) -> 'pl.DataFrame':
+        """
+        Convert the columns to 64-bit integers, rounding down
+        """
+        return df.with_columns([pl.col(column).cast(pl.Float64).floor().cast(pl.Int64) for column in columns])
+
+
+BACKENDS = {'pandas': PandasBackend()}
+if pl is not None:
+    BACKENDS['polars'] = PolarsBackend()
+
+
+def get_backend(name: str) -> PandasBackend or PolarsBackend:
+    """
+    Return the backend evaluating the consolidation stages.
+
+    Args:
+        name: 'pandas', or 'polars' (requires the polars package).
+
+    Returns:
+        The backend object.
+    """
+
+    if name == 'polars' and pl is None:
+        raise ValueError("The polars backend requires the polars package.")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name}")
+
+    return BACKENDS[name]
+
+
+def get_frame_backend(df) -> PandasBackend or PolarsBackend:
+    """
+    Return the backend of a dataframe, so that the stages can be called on the dataframes of any backend.
+
+    Args:
+        df: The pandas or Polars dataframe.
+
+    Returns:
+        The backend object.
+    """
+
+    if pl is not None and isinstance(df, pl.DataFrame):
+        return BACKENDS['polars']
+
+    return BACKENDS['pandas']
+
+
+def convert(df, backend: PandasBackend or PolarsBackend):
+    """
+    Convert a dataframe to the dataframe type of the backend.
+
+    Args:
+        df: The pandas or Polars dataframe.
+        backend: The backend object.
+
+    Returns:
+        The converted dataframe, or the same dataframe if it has already the backend type.
+    """
+
+    source = get_frame_backend(df)
+    if source is backend:
+        return df
+
+    return backend.from_pandas(source.to_pandas(df))
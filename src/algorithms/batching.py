@@ -0,0 +1,396 @@
+import src.algorithms.backends as bk
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from pandas import DataFrame
+import json
+import os
+import runpy
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+# paths of src/paths.py that are not inputs of the consolidation, as with the command line
+IGNORED_PATHS = ['COURSE_DATES_PATH', 'DIRECTORY_PATH']
+
+# fields of the jobs and of their defaults in a manifest
+JOB_FIELDS = ['name', 'paths', 'inputs', 'parameters', 'output', 'format', 'table', 'split']
+
+# number of times a job is run before it is marked as failed
+MAX_ATTEMPTS = 3
+
+# interval (in seconds) between the refreshes of the lock of a running job
+HEARTBEAT = 30
+
+# age (in seconds) of the lock of a running job after which its worker is considered dead and the job is run again;
+# it must exceed the heartbeat and the clock differences between the machines sharing the queue
+STALE_TIMEOUT = 600
+
+# interval (in seconds) between two passes of a worker over the jobs locked by other workers
+POLL_INTERVAL = 5
+
+
+def _get_output_path(output: str, suffix: str) -> str:
+    """
+    Return the output path of a part of a job, e.g. 'out/moodle_2023.csv' for 'out/moodle.csv' and '2023'.
+    """
+
+    root, extension = os.path.splitext(output)
+
+    return f'{root}_{suffix}{extension}'
+
+
+def read_manifest(manifest_path: str) -> [dict]:
+    """
+    Read the manifest of a batch of consolidations, a JSON file such as:
+        {"defaults": {"parameters": {"backend": "polars"}, "format": "sqlite"},
+         "jobs": [{"name": "moodle_a", "paths": "instances/moodle_a/paths.py", "output": "out/moodle_a.sqlite",
+                   "split": {"years": [2022, 2023]}},
+                  {"name": "moodle_b", "inputs": {"platform_logs": "b/logs.csv", "database_data": "b/db.csv", ...},
+                   "output": "out/moodle_b.csv", "split": {"courses": [[0, 4999], [5000, 9999]]}}]}
+
+    The inputs of a job are read from a file in the format of src/paths.py ("paths": PLATFORM_LOGS_PATH is the input
+    platform_logs, and so on, except IGNORED_PATHS) and/or given by the names of the parameters of
+    get_consolidated_data ("inputs"). The other parameters of get_consolidated_data (e.g. "backend" or "columns") are
+    given in "parameters". The fields of "defaults" apply to all the jobs, and a job overrides them: its "inputs" and
+    "parameters" are merged with those of "defaults", its other fields replace them. The relative paths are relative to
+    the working directory of the workers. Unknown fields are rejected.
+
+    A job can be split into one job per year (of the 'Year' field) or per range of course ids (inclusive), whose output
+    paths end with the year or the range, e.g. out/moodle_a_2022.sqlite or out/moodle_b_courses_0-4999.csv.
+
+    Args:
+        manifest_path: The path of the manifest.
+
+    Returns:
+        The jobs, with their unique 'name', 'inputs', 'parameters', 'output', 'format', 'table', and the 'years' or the
+        'courses' they are restricted to.
+    """
+
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+
+    unknown = sorted(set(manifest) - {'defaults', 'jobs'})
+    unknown += sorted(set(manifest.get('defaults', {})) - set(JOB_FIELDS))
+    unknown += sorted(set(field for job in manifest['jobs'] for field in job if field not in JOB_FIELDS))
+    if len(unknown) > 0:
+        raise ValueError(f"Unknown fields in the manifest: {unknown}")
+
+    jobs = []
+    defaults = manifest.get('defaults', {})
+    for job in manifest['jobs']:
+        description = {**defaults, **job,
+                       'inputs': {**defaults.get('inputs', {}), **job.get('inputs', {})},
+                       'parameters': {**defaults.get('parameters', {}), **job.get('parameters', {})}}
+        inputs = {}
+        if 'paths' in description:
+            # PLATFORM_LOGS_PATH -> platform_logs
+            inputs = {name[:-len('_PATH')].lower(): path for name, path in runpy.run_path(description['paths']).items()
+                      if name.endswith('_PATH') and name not in IGNORED_PATHS}
+        inputs.update(description['inputs'])
+
+        job = {'name': description['name'],
+               'inputs': inputs,
+               'parameters': description['parameters'],
+               'output': description['output'],
+               'format': description.get('format', 'csv'),
+               'table': description.get('table', 'logs'),
+               'years': None,
+               'courses': None}
+        split = description.get('split', {})
+        if 'years' in split:
+            jobs += [{**job, 'name': f"{job['name']}_{year}", 'output': _get_output_path(job['output'], str(year)),
+                      'years': [year]} for year in split['years']]
+        elif 'courses' in split:
+            jobs += [{**job, 'name': f"{job['name']}_courses_{first}-{last}",
+                      'output': _get_output_path(job['output'], f'courses_{first}-{last}'), 'courses': [first, last]}
+                     for first, last in split['courses']]
+        else:
+            jobs.append(job)
+
+    names = [job['name'] for job in jobs]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if len(duplicates) > 0:
+        raise ValueError(f"The names of the jobs must be unique: {duplicates}")
+
+    return jobs
+
+
+def select_shard(df: DataFrame, years: [int] = None, courses: [int] = None) -> DataFrame:
+    """
+    Select the logs of a part of a split job, right after the join, so that the following stages only process them.
+
+    Args:
+        df: The joined dataframe.
+        years: The years to keep, as in the 'Year' field (see backends.get_years); all by default.
+        courses: The first and the last course ids to keep; all by default.
+
+    Returns:
+        The selected logs.
+    """
+
+    selected = pd.Series(True, index=df.index)
+    if years is not None:
+        selected &= bk.get_years(df['Time']).isin(years)
+    if courses is not None:
+        selected &= df['courseid'].between(courses[0], courses[1])
+
+    return df.loc[selected].copy()
+
+
+def _get_lock_path(queue_dir: str, name: str) -> str:
+    return os.path.join(queue_dir, name + '.lock')
+
+
+def _get_status_path(queue_dir: str, name: str) -> str:
+    return os.path.join(queue_dir, name + '.json')
+
+
+def _read_status(queue_dir: str, name: str) -> dict:
+    """
+    Return the status of a job: 'pending', 'running', 'done' or 'failed', and its number of attempts.
+    """
+
+    try:
+        with open(_get_status_path(queue_dir, name)) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {'state': 'pending', 'attempts': 0}
+
+
+def _write_status(queue_dir: str, name: str, status: dict):
+    """
+    Replace the status of a job atomically; only the worker holding the lock of the job writes it.
+    """
+
+    status_path = _get_status_path(queue_dir, name)
+    temporary_path = f'{status_path}.{uuid.uuid4().hex}.tmp'
+    with open(temporary_path, 'w') as file:
+        json.dump(status, file)
+    os.replace(temporary_path, status_path)
+
+
+def _is_stale(path: str, stale_timeout: float) -> bool:
+    """
+    Check whether a lock has not been refreshed for stale_timeout seconds.
+    """
+
+    try:
+        return time.time() - os.stat(path).st_mtime > stale_timeout
+    except FileNotFoundError:
+        return False
+
+
+def claim_job(queue_dir: str, name: str, stale_timeout: float = STALE_TIMEOUT) -> str or None:
+    """
+    Lock a job for the calling worker. The lock file is created with O_CREAT | O_EXCL, which is atomic on local and
+    network (NFS v3 and later) filesystems, so that a job is claimed by a single worker across all the machines. The
+    lock of a dead worker (not refreshed for stale_timeout seconds) is reclaimed by renaming it, which only one worker
+    succeeds in doing.
+
+    Args:
+        queue_dir: The directory of the queue, on a filesystem shared by the workers.
+        name: The name of the job.
+        stale_timeout: The age (in seconds) of a lock after which it is reclaimed.
+
+    Returns:
+        The token identifying the lock, or None if the job is locked by another worker.
+    """
+
+    lock_path = _get_lock_path(queue_dir, name)
+    token = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}'
+    for _ in range(2):
+        try:
+            descriptor = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            if not _is_stale(lock_path, stale_timeout):
+                return None
+            # reclaim the lock of a dead worker
+            stale_path = f'{lock_path}.{uuid.uuid4().hex}.stale'
+            try:
+                os.rename(lock_path, stale_path)
+            except FileNotFoundError:
+                return None
+            if not _is_stale(stale_path, stale_timeout):
+                # the lock was claimed again in the meantime: give it back
+                try:
+                    os.link(stale_path, lock_path)
+                except FileExistsError:
+                    pass
+                os.remove(stale_path)
+                return None
+            os.remove(stale_path)
+            continue
+        with os.fdopen(descriptor, 'w') as file:
+            file.write(token)
+        return token
+
+    return None
+
+
+def release_job(queue_dir: str, name: str, token: str):
+    """
+    Remove the lock of a job, if it is still held by the given token.
+    """
+
+    lock_path = _get_lock_path(queue_dir, name)
+    try:
+        with open(lock_path) as file:
+            if file.read() != token:
+                return
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
+
+
+def _refresh_lock(lock_path: str, stop: threading.Event, heartbeat: float):
+    """
+    Refresh the modification time of a lock until the job ends, so that it is not reclaimed.
+    """
+
+    while not stop.wait(heartbeat):
+        try:
+            os.utime(lock_path)
+        except FileNotFoundError:
+            return
+
+
+def run_worker(queue_dir: str,
+               jobs: [dict],
+               function,
+               max_attempts: int = MAX_ATTEMPTS,
+               heartbeat: float = HEARTBEAT,
+               stale_timeout: float = STALE_TIMEOUT,
+               poll_interval: float = POLL_INTERVAL) -> int:
+    """
+    Run the jobs of a queue until they are all done or failed, along with the other workers of the queue (on the same
+    machine or on other machines sharing the queue directory). Each job is claimed (see claim_job), run, and its status
+    (state, attempts, host, start time, duration, result or error) is recorded in the queue directory. A failed job is
+    run again, by any worker, until it has been attempted max_attempts times; so is a job whose worker died.
+
+    Args:
+        queue_dir: The directory of the queue, on a filesystem shared by the workers.
+        jobs: The jobs (see read_manifest); all the workers must be given the same jobs.
+        function: The function running a job; it must be picklable to run several workers (see run_batch), and its
+            result must be JSON-serializable.
+        max_attempts: The number of times a job is run before it is marked as failed.
+        heartbeat: The interval (in seconds) between the refreshes of the lock of the running job.
+        stale_timeout: The age (in seconds) of a lock after which its worker is considered dead.
+        poll_interval: The interval (in seconds) between two passes over the jobs locked by other workers.
+
+    Returns:
+        The number of jobs run by the worker.
+    """
+
+    os.makedirs(queue_dir, exist_ok=True)
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+    runs = 0
+    while True:
+        remaining, claimed = False, False
+        for job in jobs:
+            name = job['name']
+            if _read_status(queue_dir, name)['state'] in ['done', 'failed']:
+                continue
+            remaining = True
+            token = claim_job(queue_dir, name, stale_timeout)
+            if token is None:
+                continue
+            claimed = True
+            try:
+                # the job may have ended between the status check and the claim
+                status = _read_status(queue_dir, name)
+                if status['state'] in ['done', 'failed']:
+                    continue
+                if status['attempts'] >= max_attempts:
+                    # the worker of the last attempt died
+                    _write_status(queue_dir, name, {**status, 'state': 'failed'})
+                    continue
+
+                status.update(state='running', attempts=status['attempts'] + 1, worker=worker, started=time.time())
+                _write_status(queue_dir, name, status)
+                print(f"[{worker}] {name}: started (attempt {status['attempts']}/{max_attempts})", flush=True)
+
+                stop = threading.Event()
+                refresh = threading.Thread(target=_refresh_lock, daemon=True,
+                                           args=(_get_lock_path(queue_dir, name), stop, heartbeat))
+                refresh.start()
+                start = time.perf_counter()
+                try:
+                    status.update(state='done', result=function(job), error=None)
+                except Exception as error:
+                    status.update(state='pending' if status['attempts'] < max_attempts else 'failed',
+                                  error=''.join(traceback.format_exception_only(error)).strip())
+                finally:
+                    stop.set()
+                    refresh.join()
+                status['duration'] = time.perf_counter() - start
+                _write_status(queue_dir, name, status)
+                runs += 1
+                print(f"[{worker}] {name}: {status['state']} in {status['duration']:.1f} s" +
+                      (f" ({status['error']})" if status['error'] is not None else ''), flush=True)
+            finally:
+                release_job(queue_dir, name, token)
+
+        if not remaining:
+            return runs
+        if not claimed:
+            # the remaining jobs are run by other workers
+            time.sleep(poll_interval)
+
+
+def get_progress(queue_dir: str, jobs: [dict]) -> DataFrame:
+    """
+    Return the progress of a batch: the state, the number of attempts, the worker, the duration (in seconds) and the
+    error of each job.
+
+    Args:
+        queue_dir: The directory of the queue.
+        jobs: The jobs (see read_manifest).
+
+    Returns:
+        The status of the jobs, indexed by name.
+    """
+
+    statuses = [{'name': job['name'], **_read_status(queue_dir, job['name'])} for job in jobs]
+    progress = pd.DataFrame(statuses, columns=['name', 'state', 'attempts', 'worker', 'duration', 'error'])
+
+    return progress.set_index('name')
+
+
+def run_batch(jobs: [dict],
+              queue_dir: str,
+              function,
+              processes: int = 1,
+              max_attempts: int = MAX_ATTEMPTS,
+              heartbeat: float = HEARTBEAT,
+              stale_timeout: float = STALE_TIMEOUT,
+              poll_interval: float = POLL_INTERVAL) -> DataFrame:
+    """
+    Run a batch of jobs with several worker processes (see run_worker). The same batch can be run at the same time on
+    several machines sharing the queue directory: each job is run once, by the first worker claiming it, and a batch
+    interrupted on a machine is resumed by running it again (the done jobs are skipped).
+
+    Args:
+        jobs: The jobs (see read_manifest).
+        queue_dir: The directory of the queue, on a filesystem shared by the machines.
+        function: The function running a job (see run_worker).
+        processes: The number of worker processes on this machine.
+        max_attempts: The number of times a job is run before it is marked as failed.
+        heartbeat: The interval (in seconds) between the refreshes of the lock of a running job.
+        stale_timeout: The age (in seconds) of a lock after which its worker is considered dead.
+        poll_interval: The interval (in seconds) between two passes over the jobs locked by other workers.
+
+    Returns:
+        The progress of the batch (see get_progress).
+    """
+
+    arguments = (queue_dir, jobs, function, max_attempts, heartbeat, stale_timeout, poll_interval)
+    if processes == 1:
+        run_worker(*arguments)
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            for worker in [executor.submit(run_worker, *arguments) for _ in range(processes)]:
+                worker.result()
+
+    return get_progress(queue_dir, jobs)
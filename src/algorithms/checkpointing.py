@@ -0,0 +1,134 @@
+import src.algorithms.storing as st
+from pandas import DataFrame
+import glob
+import hashlib
+import json
+import os
+import shutil
+
+
+def _get_file_signatures(path: str or [str]) -> list:
+    """
+    Return the path, size and modification time of the input files (of all the files of a directory).
+    """
+
+    if isinstance(path, list):
+        return [signature for file_path in path for signature in _get_file_signatures(file_path)]
+    if path == '':
+        return []
+    if os.path.isdir(path):
+        return _get_file_signatures(sorted(glob.glob(os.path.join(path, '*'))))
+
+    status = os.stat(path)
+
+    return [[os.path.abspath(path), status.st_size, status.st_mtime_ns]]
+
+
+def get_fingerprint(inputs: dict, parameters: dict = None) -> str:
+    """
+    Return the fingerprint of a consolidation run: it changes if any input file is modified (size or modification
+    time) or if the parameters change.
+
+    Args:
+        inputs: The paths of the inputs, by name (as the parameters of get_consolidated_data).
+        parameters: The other parameters of the run.
+
+    Returns:
+        The hexadecimal fingerprint.
+    """
+
+    signatures = {name: _get_file_signatures(path) for name, path in sorted(inputs.items())}
+    content = json.dumps({'inputs': signatures, 'parameters': parameters}, sort_keys=True, default=str)
+
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def save_checkpoint(checkpoint_dir: str, fingerprint: str, stage: str, df: DataFrame):
+    """
+    Save the dataframe produced by a stage in the binary store format (see storing.write_store), then record it as the
+    last good checkpoint. The previous checkpoint is removed once the new one is recorded, so that a failure while
+    saving never leaves an inconsistent checkpoint.
+
+    Args:
+        checkpoint_dir: The directory of the checkpoints.
+        fingerprint: The fingerprint of the run (see get_fingerprint).
+        stage: The name of the completed stage.
+        df: The dataframe produced by the stage.
+    """
+
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    previous = _read_manifest(checkpoint_dir)
+
+    # the index is saved as a column, since some stages do not reset it
+    st.write_store(df.reset_index(names='__index__'), os.path.join(checkpoint_dir, stage))
+
+    # record the checkpoint
+    manifest_path = os.path.join(checkpoint_dir, 'manifest.json')
+    with open(manifest_path + '.tmp', 'w') as file:
+        json.dump({'fingerprint': fingerprint, 'stage': stage}, file)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    if previous is not None and previous['stage'] != stage:
+        shutil.rmtree(os.path.join(checkpoint_dir, previous['stage']), ignore_errors=True)
+
+
+def _read_manifest(checkpoint_dir: str) -> dict or None:
+    """
+    Return the description of the last good checkpoint, if any.
+    """
+
+    try:
+        with open(os.path.join(checkpoint_dir, 'manifest.json')) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def load_checkpoint(checkpoint_dir: str, fingerprint: str) -> (str, DataFrame) or None:
+    """
+    Return the last good checkpoint of a run, if the inputs and the parameters of the run are unchanged.
+
+    Args:
+        checkpoint_dir: The directory of the checkpoints.
+        fingerprint: The fingerprint of the run (see get_fingerprint).
+
+    Returns:
+        The name of the last completed stage and the dataframe it produced, or None if there is no valid checkpoint
+        (an unreadable checkpoint is ignored, so that the run starts over).
+    """
+
+    manifest = _read_manifest(checkpoint_dir)
+    if manifest is None or manifest.get('fingerprint') != fingerprint:
+        return None
+
+    try:
+        df = st.open_store(os.path.join(checkpoint_dir, manifest['stage'])).to_frame()
+    except (OSError, ValueError, KeyError, IndexError, TypeError):
+        # the checkpoint is discarded, its store is replaced or removed by the next save
+        os.remove(os.path.join(checkpoint_dir, 'manifest.json'))
+        return None
+    df = df.set_index('__index__')
+    df.index.name = None
+
+    return manifest['stage'], df
+
+
+def remove_checkpoints(checkpoint_dir: str, stages: [str]):
+    """
+    Remove the checkpoints of a run: only the manifest and the stores written by save_checkpoint are removed, not the
+    directory itself nor the other files it may contain.
+
+    Args:
+        checkpoint_dir: The directory of the checkpoints.
+        stages: The names of the stages of the run.
+    """
+
+    for name in ['manifest.json', 'manifest.json.tmp']:
+        if os.path.isfile(os.path.join(checkpoint_dir, name)):
+            os.remove(os.path.join(checkpoint_dir, name))
+
+    # the stores of the stages, including those of interrupted saves
+    for stage in stages:
+        for path in [os.path.join(checkpoint_dir, stage), os.path.join(checkpoint_dir, stage + '.tmp')]:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
@@ -1,8 +1,9 @@
 from pandas import DataFrame
-import src.algorithms.integrating as it
+import src.algorithms.encoding as en
+import src.algorithms.loading as ld
 
 
-def remove_deleted_users(df: DataFrame, deleted_users: str) -> DataFrame:
+def remove_deleted_users(df: DataFrame, deleted_users: str or DataFrame) -> DataFrame:
     """
     Remove records related to deleted users.
 
@@ -13,17 +14,15 @@ def remove_deleted_users(df: DataFrame, deleted_users: str) -> DataFrame:
 
     Args:
         df (object): The dataframe object.
-        deleted_users: The path to deleted users file
+        deleted_users: The path to deleted users file or the dataframe read by loading.read_deleted_users.
 
     Returns:
         The cleaned dataframe.
 
     """
-    if deleted_users != '':
-        # get data
-        deleted_users = it.get_dataframe(deleted_users, columns='id')
-        # set data types
-        deleted_users['id'] = deleted_users['id'].astype('Int64')
+    # get data
+    deleted_users = ld.get_input(deleted_users, ld.read_deleted_users)
+    if deleted_users is not None:
         # remove records of deleted users
         for user_id in deleted_users['id']:
             deleted_user_logs = list((df.loc[df['userid'] == user_id]).index)
@@ -40,12 +39,15 @@ def remove_automatic_events(df: DataFrame) -> DataFrame:
     to avoid biased results.
     """
 
+    code = df['Event_code']
+
     # automatically generated events that do not involve student actions
-    grd_itm_ctd = list((df.loc[df['Role'] == 'Student'].loc[df['Event_name'] == 'Grade item created']).index)
-    grd_itm_upd = list((df.loc[df['Role'] == 'Student'].loc[df['Event_name'] == 'Grade item updated']).index)
-    user_graded = list((df.loc[df['Role'] == 'Student'].loc[df['Event_name'] == 'User graded']).index)
-    notification = list((df.loc[df['Event_name'] == 'Notification sent']).index)
-    prediction = list((df.loc[df['Event_name'] == 'Prediction process started']).index)
+    student = df['Role'] == 'Student'
+    grd_itm_ctd = list((df.loc[student & code.isin(en.get_event_codes('Grade item created'))]).index)
+    grd_itm_upd = list((df.loc[student & code.isin(en.get_event_codes('Grade item updated'))]).index)
+    user_graded = list((df.loc[student & code.isin(en.get_event_codes('User graded'))]).index)
+    notification = list((df.loc[code.isin(en.get_event_codes('Notification sent'))]).index)
+    prediction = list((df.loc[code.isin(en.get_event_codes('Prediction process started'))]).index)
     cron = list((df.loc[df['Username'] == '-']).index)
     cli = list((df.loc[df['Origin'] == 'cli']).index)
     restore = list((df.loc[df['Origin'] == 'restore']).index)
@@ -0,0 +1,283 @@
+from fnmatch import fnmatch
+from pandas import DataFrame
+import numpy as np
+import pandas as pd
+import re
+
+# code assigned to the events that are not listed in the catalogue
+UNKNOWN_EVENT = 0
+
+# Moodle components (the 'component' field of the table 'mdl_logstore_standard_log') used by the consolidation rules,
+# by English display name
+COMPONENTS = {'System': 'core', 'Chat': 'mod_chat'}
+
+# Catalogue of the Moodle events used by the consolidation rules. Each entry maps the English display name of the event
+# to its code and to the classes logged in the 'eventname' field of the table 'mdl_logstore_standard_log'. A '*' in the
+# class name matches any plugin (e.g. the 'course_module_viewed' event is triggered by every activity module). Events
+# without a class can only be recognised from their English display name. The catalogue can be extended according to
+# specific requirements: since the codes are saved with the consolidated data ('Event_code'), the code of an event must
+# never change, and a new event takes the next unused code (149, then 150, etc.).
+EVENTS = {
+    # authentication
+    'User has logged in': (130, ['\\core\\event\\user_loggedin']),
+    'User logged in as another user': (132, ['\\core\\event\\user_loggedinas']),
+    'User login failed': (134, ['\\core\\event\\user_login_failed']),
+    'User logged out': (133, ['\\core\\event\\user_loggedout']),
+    # badges
+    'Badge archived': (1, ['\\core\\event\\badge_archived']),
+    'Badge awarded': (2, ['\\core\\event\\badge_awarded']),
+    'Badge created': (3, ['\\core\\event\\badge_created']),
+    'Badge criteria created': (4, ['\\core\\event\\badge_criteria_created']),
+    'Badge criteria deleted': (5, ['\\core\\event\\badge_criteria_deleted']),
+    'Badge criteria updated': (6, ['\\core\\event\\badge_criteria_updated']),
+    'Badge deleted': (7, ['\\core\\event\\badge_deleted']),
+    'Badge disabled': (8, ['\\core\\event\\badge_disabled']),
+    'Badge duplicated': (9, ['\\core\\event\\badge_duplicated']),
+    'Badge enabled': (10, ['\\core\\event\\badge_enabled']),
+    'Badge listing viewed': (11, ['\\core\\event\\badge_listing_viewed']),
+    'Badge revoked': (12, ['\\core\\event\\badge_revoked']),
+    'Badge updated': (13, ['\\core\\event\\badge_updated']),
+    'Badge viewed': (14, ['\\core\\event\\badge_viewed']),
+    # blogs
+    'Blog association created': (15, ['\\core\\event\\blog_association_created']),
+    'Blog entries viewed': (16, ['\\core\\event\\blog_entries_viewed']),
+    'Blog entry added': (17, ['\\core\\event\\blog_entry_created']),
+    'Blog entry deleted': (18, ['\\core\\event\\blog_entry_deleted']),
+    'Blog entry updated': (19, ['\\core\\event\\blog_entry_updated']),
+    # calendar
+    'Calendar event created': (20, ['\\core\\event\\calendar_event_created']),
+    'Calendar event deleted': (21, ['\\core\\event\\calendar_event_deleted']),
+    'Calendar event updated': (22, ['\\core\\event\\calendar_event_updated']),
+    'Calendar subscription created': (23, ['\\core\\event\\calendar_subscription_created']),
+    'Calendar subscription deleted': (24, ['\\core\\event\\calendar_subscription_deleted']),
+    'Calendar subscription updated': (25, ['\\core\\event\\calendar_subscription_updated']),
+    # capabilities and roles
+    'Capability assigned': (26, ['\\core\\event\\capability_assigned']),
+    'Capability unassigned': (27, ['\\core\\event\\capability_unassigned']),
+    'Role assigned': (106, ['\\core\\event\\role_assigned']),
+    'Role capabilities updated': (107, ['\\core\\event\\role_capabilities_updated']),
+    'Role deleted': (108, ['\\core\\event\\role_deleted']),
+    'Role unassigned': (109, ['\\core\\event\\role_unassigned']),
+    # categories and courses
+    'Category created': (28, ['\\core\\event\\course_category_created']),
+    'Category deleted': (29, ['\\core\\event\\course_category_deleted']),
+    'Category updated': (30, ['\\core\\event\\course_category_updated']),
+    'Category viewed': (31, ['\\core\\event\\course_category_viewed']),
+    'Course activity completion updated': (37, ['\\core\\event\\course_module_completion_updated']),
+    'Course created': (38, ['\\core\\event\\course_created']),
+    'Course deleted': (39, ['\\core\\event\\course_deleted']),
+    'Course module created': (40, ['\\core\\event\\course_module_created']),
+    'Course module deleted': (41, ['\\core\\event\\course_module_deleted']),
+    'Course module instance list viewed': (42, ['\\mod_*\\event\\course_module_instance_list_viewed']),
+    'Course module updated': (43, ['\\core\\event\\course_module_updated']),
+    'Course module viewed': (44, ['\\mod_*\\event\\course_module_viewed']),
+    'Course section created': (45, ['\\core\\event\\course_section_created']),
+    'Course section deleted': (46, ['\\core\\event\\course_section_deleted']),
+    'Course section updated': (47, ['\\core\\event\\course_section_updated']),
+    'Course updated': (48, ['\\core\\event\\course_updated']),
+    'Course viewed': (50, ['\\core\\event\\course_viewed']),
+    'Courses searched': (51, ['\\core\\event\\courses_searched']),
+    # content bank
+    'Content created': (32, ['\\core\\event\\contentbank_content_created']),
+    'Content deleted': (33, ['\\core\\event\\contentbank_content_deleted']),
+    'Content updated': (34, ['\\core\\event\\contentbank_content_updated']),
+    'Content uploaded': (35, ['\\core\\event\\contentbank_content_uploaded']),
+    'Content viewed': (36, ['\\core\\event\\contentbank_content_viewed']),
+    # dashboard
+    'Dashboard reset': (52, ['\\core\\event\\dashboard_reset']),
+    'Dashboard viewed': (53, ['\\core\\event\\dashboard_viewed']),
+    'Dashboards reset': (54, ['\\core\\event\\dashboards_reset']),
+    # enrolment
+    'User enrolled in course': (127, ['\\core\\event\\user_enrolment_created']),
+    'User enrolment updated': (128, ['\\core\\event\\user_enrolment_updated']),
+    'User unenrolled from course': (138, ['\\core\\event\\user_enrolment_deleted']),
+    # forum
+    'Discussion created': (55, ['\\mod_forum\\event\\discussion_created']),
+    'Discussion deleted': (56, ['\\mod_forum\\event\\discussion_deleted']),
+    'Discussion moved': (57, ['\\mod_forum\\event\\discussion_moved']),
+    'Discussion pinned': (58, ['\\mod_forum\\event\\discussion_pinned']),
+    'Discussion subscription created': (59, ['\\mod_forum\\event\\discussion_subscription_created']),
+    'Discussion subscription deleted': (60, ['\\mod_forum\\event\\discussion_subscription_deleted']),
+    'Discussion unpinned': (61, ['\\mod_forum\\event\\discussion_unpinned']),
+    'Discussion updated': (62, ['\\mod_forum\\event\\discussion_updated']),
+    'Discussion viewed': (63, ['\\mod_forum\\event\\discussion_viewed']),
+    'Post created': (92, ['\\mod_forum\\event\\post_created']),
+    'Post deleted': (93, ['\\mod_forum\\event\\post_deleted']),
+    'Post updated': (94, ['\\mod_forum\\event\\post_updated']),
+    'Subscription created': (113, ['\\mod_forum\\event\\subscription_created']),
+    'Subscription deleted': (114, ['\\mod_forum\\event\\subscription_deleted']),
+    # grades
+    'Grade deleted': (64, ['\\core\\event\\grade_deleted']),
+    'Grade item created': (65, ['\\core\\event\\grade_item_created']),
+    'Grade item deleted': (66, ['\\core\\event\\grade_item_deleted']),
+    'Grade item updated': (67, ['\\core\\event\\grade_item_updated']),
+    'Grade overview report viewed': (68, ['\\gradereport_overview\\event\\grade_report_viewed']),
+    'Course user report viewed': (49, ['\\core\\event\\course_user_report_viewed']),
+    'Scale created': (110, ['\\core\\event\\scale_created']),
+    'Scale deleted': (111, ['\\core\\event\\scale_deleted']),
+    'Scale updated': (112, ['\\core\\event\\scale_updated']),
+    'User graded': (129, ['\\core\\event\\user_graded']),
+    'User report viewed': (137, ['\\gradereport_user\\event\\grade_report_viewed']),
+    # groups
+    'Group assigned to grouping': (69, ['\\core\\event\\grouping_group_assigned']),
+    'Group created': (70, ['\\core\\event\\group_created']),
+    'Group deleted': (71, ['\\core\\event\\group_deleted']),
+    'Group member added': (72, ['\\core\\event\\group_member_added']),
+    'Group member removed': (73, ['\\core\\event\\group_member_removed']),
+    'Group unassigned from grouping': (75, ['\\core\\event\\grouping_group_unassigned']),
+    'Group updated': (76, ['\\core\\event\\group_updated']),
+    'Grouping created': (77, ['\\core\\event\\grouping_created']),
+    'Grouping deleted': (78, ['\\core\\event\\grouping_deleted']),
+    'Grouping updated': (79, ['\\core\\event\\grouping_updated']),
+    # messaging and notifications
+    'Group message sent': (74, ['\\core\\event\\group_message_sent']),
+    'Message contact added': (81, ['\\core\\event\\message_contact_added']),
+    'Message contact removed': (82, ['\\core\\event\\message_contact_removed']),
+    'Message deleted': (83, ['\\core\\event\\message_deleted']),
+    'Message sent': (84, ['\\core\\event\\message_sent', '\\mod_chat\\event\\message_sent']),
+    'Message viewed': (85, ['\\core\\event\\message_viewed']),
+    'Notification sent': (90, ['\\core\\event\\notification_sent']),
+    'Notification viewed': (91, ['\\core\\event\\notification_viewed']),
+    # notes
+    'Note created': (86, ['\\core\\event\\note_created']),
+    'Note deleted': (87, ['\\core\\event\\note_deleted']),
+    'Note updated': (88, ['\\core\\event\\note_updated']),
+    'Notes viewed': (89, ['\\core\\event\\notes_viewed']),
+    # questions
+    'Question category created': (96, ['\\core\\event\\question_category_created']),
+    'Question category deleted': (97, ['\\core\\event\\question_category_deleted']),
+    'Question category updated': (98, ['\\core\\event\\question_category_updated']),
+    'Question category viewed': (99, ['\\core\\event\\question_category_viewed']),
+    'Question created': (100, ['\\core\\event\\question_created']),
+    'Question deleted': (101, ['\\core\\event\\question_deleted']),
+    'Question updated': (102, ['\\core\\event\\question_updated']),
+    'Question viewed': (103, ['\\core\\event\\question_viewed']),
+    'Questions exported': (104, ['\\core\\event\\questions_exported']),
+    'Questions imported': (105, ['\\core\\event\\questions_imported']),
+    # reports and analytics
+    'Insights viewed': (80, ['\\core\\event\\insights_viewed']),
+    'Prediction process started': (95, ['\\core\\event\\prediction_process_started']),
+    # tags
+    'Tag added to an item': (115, ['\\core\\event\\tag_added']),
+    'Tag collection created': (116, ['\\core\\event\\tag_collection_created']),
+    'Tag collection deleted': (117, ['\\core\\event\\tag_collection_deleted']),
+    'Tag collection updated': (118, ['\\core\\event\\tag_collection_updated']),
+    'Tag created': (119, ['\\core\\event\\tag_created']),
+    'Tag deleted': (120, ['\\core\\event\\tag_deleted']),
+    'Tag flagged': (121, ['\\core\\event\\tag_flagged']),
+    'Tag removed from an item': (122, ['\\core\\event\\tag_removed']),
+    'Tag unflagged': (123, ['\\core\\event\\tag_unflagged']),
+    'Tag updated': (124, ['\\core\\event\\tag_updated']),
+    # users
+    'User created': (125, ['\\core\\event\\user_created']),
+    'User deleted': (126, ['\\core\\event\\user_deleted']),
+    'User list viewed': (131, ['\\core\\event\\user_list_viewed']),
+    'User password updated': (135, ['\\core\\event\\user_password_updated']),
+    'User profile viewed': (136, ['\\core\\event\\user_profile_viewed']),
+    'User updated': (139, ['\\core\\event\\user_updated']),
+    # web services
+    'Web service function called': (140, ['\\core\\event\\webservice_function_called']),
+    'Web service login failed': (141, ['\\core\\event\\webservice_login_failed']),
+    'Web service service created': (142, ['\\core\\event\\webservice_service_created']),
+    'Web service service deleted': (143, ['\\core\\event\\webservice_service_deleted']),
+    'Web service service updated': (144, ['\\core\\event\\webservice_service_updated']),
+    'Web service service user added': (145, ['\\core\\event\\webservice_service_user_added']),
+    'Web service service user removed': (146, ['\\core\\event\\webservice_service_user_removed']),
+    'Web service token created': (147, ['\\core\\event\\webservice_token_created']),
+    'Web service token sent': (148, ['\\core\\event\\webservice_token_sent']),
+}
+
+# integer code of each event (0 identifies unknown events)
+EVENT_CODES = {name: code for name, (code, _) in EVENTS.items()}
+if len(set(EVENT_CODES.values())) != len(EVENT_CODES) or UNKNOWN_EVENT in EVENT_CODES.values():
+    raise ValueError("The codes of the events must be unique and different from UNKNOWN_EVENT.")
+
+
+def get_event_codes(*names: str) -> [int]:
+    """
+    Return the codes of the events with the given English display names.
+
+    Args:
+        names: The display names of the events (e.g. 'User has logged in').
+
+    Returns:
+        The list of event codes.
+    """
+
+    return [EVENT_CODES[name] for name in names]
+
+
+def get_matching_event_codes(pattern: str) -> [int]:
+    """
+    Return the codes of the events whose English display name matches the regular expression, in the same way as
+    'Series.str.contains' does.
+
+    Args:
+        pattern: The regular expression (e.g. 'Web service' or '(?i)message').
+
+    Returns:
+        The list of event codes.
+    """
+
+    regex = re.compile(pattern)
+
+    return [code for name, code in EVENT_CODES.items() if regex.search(name)]
+
+
+def _get_class_code(event_class: str) -> int:
+    """
+    Return the code of a Moodle event class (e.g. '\\core\\event\\user_loggedin').
+    """
+
+    # missing classes ('\\N' values are read as 0)
+    if not isinstance(event_class, str):
+        return UNKNOWN_EVENT
+
+    for name, (_, classes) in EVENTS.items():
+        for pattern in classes:
+            if event_class == pattern or ('*' in pattern and fnmatch(event_class, pattern)):
+                return EVENT_CODES[name]
+
+    return UNKNOWN_EVENT
+
+
+def encode_events(df: DataFrame) -> DataFrame:
+    """
+    Add the integer field 'Event_code' that identifies the event independently of the language of the site. The code
+    is obtained from the event class stored in the field 'Event_class' (the 'eventname' field of the table
+    'mdl_logstore_standard_log'). If the class is missing or not listed in the catalogue, the English display name of
+    the field 'Event_name' is used instead. Events that cannot be recognised get the code UNKNOWN_EVENT.
+
+    The field 'Event_component' (the 'component' field of the table) is completed with the components of COMPONENTS,
+    given by the English display name of the field 'Component', where it is missing (e.g. in older database dumps).
+
+    Args:
+        df: The dataframe object.
+
+    Returns:
+        The dataframe with the fields 'Event_code' and 'Event_component'.
+    """
+
+    # get the codes from the English display names
+    names, unique_names = pd.factorize(df['Event_name'])
+    name_codes = [EVENT_CODES.get(name, UNKNOWN_EVENT) for name in unique_names]
+    codes = pd.Series(name_codes, dtype='int16').reindex(names).fillna(UNKNOWN_EVENT).to_numpy('int16')
+
+    if 'Event_class' in df.columns:
+        # get the codes from the event classes, each distinct class is looked up once
+        classes, unique_classes = pd.factorize(df['Event_class'])
+        class_codes = [_get_class_code(event_class) for event_class in unique_classes]
+        class_codes = pd.Series(class_codes, dtype='int16').reindex(classes).fillna(UNKNOWN_EVENT).to_numpy('int16')
+        # prefer the class, which does not depend on the language of the site
+        codes[class_codes != UNKNOWN_EVENT] = class_codes[class_codes != UNKNOWN_EVENT]
+
+    df['Event_code'] = codes
+
+    # missing components ('\\N' values are read as 0)
+    display_components = df['Component'].map(COMPONENTS) if 'Component' in df.columns else np.nan
+    if 'Event_component' in df.columns:
+        df['Event_component'] = df['Event_component'].replace(0, np.nan).fillna(display_components)
+    else:
+        df['Event_component'] = display_components
+
+    return df
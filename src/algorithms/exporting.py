@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+import sqlite3
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# number of rows inserted at a time
+BATCH_SIZE = 50000
+
+# indexes created on the exported table, when it has their columns
+INDEXES = [['Year', 'Course_Area'], ['userid', 'Unix_Time'], ['Role'], ['Component']]
+
+
+def _get_sql_type(dtype) -> str:
+    """
+    Return the SQL type of a column.
+    """
+
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biu':
+        return 'INTEGER'
+    if isinstance(dtype, np.dtype) and dtype.kind == 'f':
+        return 'DOUBLE'
+    if str(dtype) == 'Int64':
+        return 'INTEGER'
+
+    return 'TEXT'
+
+
+def _get_table_columns(connection, table: str) -> [str] or None:
+    """
+    Return the columns of an existing table, or None if the table does not exist.
+    """
+
+    if isinstance(connection, sqlite3.Connection):
+        query = "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?"
+    else:
+        query = "SELECT table_name FROM information_schema.tables WHERE table_name = ?"
+    if connection.execute(query, [table]).fetchone() is None:
+        return None
+
+    cursor = connection.execute(f'SELECT * FROM "{table}" LIMIT 0')
+
+    return [description[0] for description in cursor.description]
+
+
+def export_to_database(df: DataFrame,
+                       database_path: str,
+                       table: str = 'logs',
+                       key: str = 'ID',
+                       engine: str = 'sqlite',
+                       batch_size: int = BATCH_SIZE) -> int:
+    """
+    Load the consolidated dataframe into a table of an embedded SQLite (or DuckDB) database file, so that ad hoc queries
+    (e.g. GROUP BY year and course) run on indexes instead of parsing the CSV file. The rows are inserted in batches,
+    in a single transaction, and indexes are created on (Year, Course_Area), (userid, Unix_Time), Role and Component.
+
+    The export is incremental: if the table exists, the rows are appended, and the rows whose key (the log ID by
+    default) is already in the table are skipped, so that the data of a new consolidation run can be added to the same
+    database.
+
+    Args:
+        df: The consolidated dataframe.
+        database_path: The path of the database file; it is created if needed.
+        table: The name of the table.
+        key: The column identifying the rows (the primary key of the table); None to append all the rows.
+        engine: 'sqlite', or 'duckdb' (requires the duckdb package).
+        batch_size: The number of rows inserted at a time.
+
+    Returns:
+        The number of rows of the table.
+    """
+
+    if engine == 'duckdb' and duckdb is None:
+        raise ValueError("The duckdb engine requires the duckdb package.")
+    if engine not in ['sqlite', 'duckdb']:
+        raise ValueError(f"Unknown engine: {engine}")
+
+    if key is not None and key not in df.columns:
+        key = None
+
+    connection = sqlite3.connect(database_path) if engine == 'sqlite' else duckdb.connect(database_path)
+    try:
+        if engine == 'sqlite':
+            connection.execute('BEGIN')
+        else:
+            connection.begin()
+
+        # create the table, or check that the columns of the existing table match
+        table_columns = _get_table_columns(connection, table)
+        if table_columns is None:
+            definitions = [f'"{column}" {_get_sql_type(df[column].dtype)}' +
+                           (' PRIMARY KEY' if column == key else '') for column in df.columns]
+            connection.execute(f'CREATE TABLE "{table}" ({", ".join(definitions)})')
+        elif table_columns != list(df.columns):
+            raise ValueError(f"The columns of the table {table} differ from the columns of the dataframe: "
+                             f"{table_columns}")
+
+        # insert the rows in batches
+        insert = 'INSERT OR IGNORE' if key is not None else 'INSERT'
+        for start in range(0, len(df), batch_size):
+            batch = df.iloc[start:start + batch_size]
+            if engine == 'sqlite':
+                # missing values are NULL
+                batch = batch.astype(object).where(batch.notnull(), None)
+                connection.executemany(f'{insert} INTO "{table}" VALUES ({", ".join(["?"] * len(df.columns))})',
+                                       batch.itertuples(index=False, name=None))
+            else:
+                connection.register('batch', batch)
+                connection.execute(f'{insert} INTO "{table}" SELECT * FROM batch')
+                connection.unregister('batch')
+
+        # create the indexes
+        for columns in INDEXES:
+            if all(column in df.columns for column in columns):
+                index = f'{table}_' + '_'.join(columns)
+                index_columns = ', '.join(f'"{column}"' for column in columns)
+                connection.execute(f'CREATE INDEX IF NOT EXISTS "{index}" ON "{table}" ({index_columns})')
+        connection.commit()
+
+        return connection.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def query_database(database_path: str, query: str, parameters: list = None, engine: str = 'sqlite') -> DataFrame:
+    """
+    Run a query on a database created by export_to_database.
+
+    Args:
+        database_path: The path of the database file.
+        query: The SQL query, e.g. 'SELECT Course_Area, COUNT(*) FROM logs WHERE Year = ? GROUP BY Course_Area'.
+        parameters: The values of the query parameters.
+        engine: 'sqlite', or 'duckdb' (requires the duckdb package).
+
+    Returns:
+        The result of the query.
+    """
+
+    if engine == 'duckdb' and duckdb is None:
+        raise ValueError("The duckdb engine requires the duckdb package.")
+    if engine not in ['sqlite', 'duckdb']:
+        raise ValueError(f"Unknown engine: {engine}")
+
+    if engine == 'sqlite':
+        connection = sqlite3.connect(database_path)
+    else:
+        connection = duckdb.connect(database_path, read_only=True)
+    try:
+        cursor = connection.execute(query, parameters or [])
+        columns = [description[0] for description in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+    finally:
+        connection.close()
@@ -1,6 +1,8 @@
+from src.classes.indexed_records import IndexedRecords
 from src.classes.records import Records
-import src.algorithms.integrating as it
+import src.algorithms.loading as ld
 from pandas import DataFrame
+import numpy as np
 
 
 def get_startdate_enddate(df: DataFrame, course_dates: str, courses: [str], years: [int]):
@@ -26,7 +28,7 @@ def get_startdate_enddate(df: DataFrame, course_dates: str, courses: [str], year
 
     """
 
-    course_dates = it.get_dataframe(course_dates, columns=['id', 'shortname', 'startdate', 'enddate'])
+    course_dates = ld.get_dataframe(course_dates, columns=['id', 'shortname', 'startdate', 'enddate'])
 
     for course in courses:
         for year in years:
@@ -53,7 +55,8 @@ def extract_records(records: Records,
 
     Args:
         records: Records,
-            The object of the class Records.
+            The object of the class Records, or of the class IndexedRecords to answer repeated selections faster. If the
+            records are backed by a store (see Records.from_store), only the selected rows are decoded.
         year: list of int,
             Year of the course/area.
         course_area: list of str,
@@ -79,12 +82,22 @@ def extract_records(records: Records,
     # columns in the dataframe
     columns = [i for i in filters if filters[i] is not None]
 
-    # get the df
-    df = records.get_df()
-
-    for column in columns:
-        # for each column filter the values
-        df = df.loc[df[column].isin(filters.get(column))]
+    if records.get_store() is not None:
+        # decode only the selected rows of the store
+        store = records.get_store()
+        df = store.to_frame(np.flatnonzero(store.get_mask(filters)))
+    elif len(columns) == 0:
+        # no selection: the dataframe is not copied
+        df = records.get_df()
+    elif isinstance(records, IndexedRecords):
+        # look up the positions of the selected values
+        df = records.get_df().iloc[records.get_positions(filters)]
+    else:
+        # get the df
+        df = records.get_df()
+        for column in columns:
+            # for each column filter the values
+            df = df.loc[df[column].isin(filters.get(column))]
 
     # get only the values between start_date and end_date
     if course_dates != "" and course_area is not None:
@@ -1,4 +1,5 @@
 from pandas import DataFrame
+import src.algorithms.encoding as en
 
 
 def filter_dataset_records(df: DataFrame) -> DataFrame:
@@ -14,18 +15,23 @@ def filter_dataset_records(df: DataFrame) -> DataFrame:
     results.
     """
 
+    # code the events of datasets consolidated without the event codes
+    if 'Event_code' not in df.columns:
+        df = en.encode_events(df)
+    code = df['Event_code']
+
     # admin and guest users
     admin = list((df.loc[df['Role'] == 'Admin']).index)
     guest = list((df.loc[df['Role'] == 'Guest']).index)
 
     # events generated before the user accesses the platform
-    failed_login = list((df.loc[df['Event_name'] == 'User login failed']).index)
+    failed_login = list((df.loc[code.isin(en.get_event_codes('User login failed'))]).index)
 
     # logs not related to learning activities
     logs = list((df.loc[df['Component'] == 'Logs']).index)
     recycle_bin = list((df.loc[df['Component'] == 'Recycle bin']).index)
     report = list((df.loc[df['Component'] == 'Report']).index)
-    insights = list((df.loc[df['Event_name'] == 'Insights viewed']).index)
+    insights = list((df.loc[code.isin(en.get_event_codes('Insights viewed'))]).index)
 
     # actions performed on deleted modules, activities, or courses
     other = list((df.loc[df['Status'] == 'DELETED']).index)
@@ -1,63 +1,206 @@
+import src.algorithms.backends as bk
+import src.algorithms.encoding as en
+import src.algorithms.loading as ld
 import src.algorithms.transforming as tr
+from src.algorithms.loading import get_dataframe, collect_user_logs
 import pandas as pd
-from pandas import DataFrame
-import glob
+from pandas import DataFrame, Series
 import numpy as np
 
 
-def get_dataframe(file_path: str, columns: [] = None) -> DataFrame:
+def _get_matching_events(pattern: str) -> list:
+    """
+    Return the rule condition (see backends) met by the events whose English display name matches the regular
+    expression: the events of the catalogue by their code (see encoding.get_matching_event_codes), and the events that
+    are not in the catalogue by their display name.
     """
-    Read the dataframe and add columns if missing.
 
-    Args:
-        file_path: The path of the dataframe object.
-        columns: The list of column names.
+    return [[('Event_code', 'in', en.get_matching_event_codes(pattern))],
+            [('Event_code', '==', en.UNKNOWN_EVENT), ('Event_name', 'contains', pattern)]]
 
-    Returns:
-        The dataframe with column names.
-    """
 
-    df = pd.read_csv(file_path, sep=',')
+# rules of redefine_course_area, applied in order (see backends)
+COURSE_AREA_RULES = [
+    # authentication
+    ('Authentication',
+     [('Event_code', 'in', en.get_event_codes('User has logged in', 'User login failed', 'User logged out'))]),
 
-    # add column names if missing
-    try:
-        value_type = int(df.columns[0])
-        if isinstance(value_type, int):
-            df = pd.read_csv(file_path, sep=',', header=None)
-            df.columns = columns
-    except ValueError:
-        pass
+    # mobile
+    ('Mobile', [_get_matching_events('Web service')]),
 
-    return df
+    # moodle site
+    ('Moodle Site', [('Event_code', 'in', en.get_event_codes('Course module instance list viewed')),
+                     ('courseid', '==', 1)]),
+    ('Moodle Site', [('Event_code', 'in', en.get_event_codes('Course module viewed')), ('courseid', '==', 1)]),
+    ('Moodle Site', [('Event_code', 'in', en.get_event_codes('Course viewed')), ('courseid', '==', 1)]),
+    ('Moodle Site', [_get_matching_events('(?i)subscription'), ('courseid', '==', 1)]),
+    ('Moodle Site', [_get_matching_events('(?i)content'), ('courseid', '==', 0)]),
+    ('Moodle Site', [('Event_code', 'in', en.get_event_codes('Courses searched'))]),
+    ('Moodle Site', [_get_matching_events('Discussion'), ('courseid', '==', 1)]),
+    ('Moodle Site', [('Event_code', 'in', en.get_event_codes('Notification viewed'))]),
+    ('Moodle Site', [_get_matching_events('(?i)category'), ('courseid', '==', 0)]),
+    ('Moodle Site', [_get_matching_events('Calendar')]),
+    ('Moodle Site', [('Event_code', 'in', en.get_event_codes('Blog entries viewed')),
+                     ('Affected_user', '== column', 'Username')]),
+    ('Moodle Site', [_get_matching_events('Role'), ('courseid', '==', 1)]),
+    ('Moodle Site', [('Event_code', 'in', en.get_event_codes('User report viewed')), ('courseid', '==', 0)]),
+    ('Moodle Site', [('Event_code', 'in', en.get_event_codes('Insights viewed')), ('courseid', '==', 0)]),
+    ('Moodle Site', [('Event_code', 'in', en.get_event_codes('User created'))]),
+    ('Moodle Site', [('Event_code', 'in', en.get_event_codes('User deleted'))]),
+    ('Moodle Site', [_get_matching_events('(?i)post'), ('courseid', '==', 1)]),
 
+    # profile
+    ('Profile', [('Event_code', 'in', en.get_event_codes('Badge viewed')), ('courseid', '==', 0)]),
+    ('Profile', [_get_matching_events('Dashboard')]),
+    ('Profile', [_get_matching_events('User password')]),
+    ('Profile', [('Event_code', 'in', en.get_event_codes('User updated'))]),
+    ('Profile', [('Event_code', 'in', en.get_event_codes('User profile viewed')),
+                 ('Affected_user', '== column', 'Username')]),
+    ('Profile', [_get_matching_events('(?i)tag'), ('courseid', '==', 0)]),
+    ('Moodle Site', [('Event_code', 'in', en.get_event_codes('Course user report viewed')), ('courseid', '==', 1)]),
+    ('Moodle Site', [('Event_code', 'in', en.get_event_codes('Grade overview report viewed')), ('courseid', '==', 1)]),
 
-def collect_user_logs(directory_path: str) -> DataFrame:
-    """
-    It is possible to choose specific users (within one or more courses) and download their logs. Then, a directory
-    should contain all related files.
+    # social interaction
+    ('Social interaction', [_get_matching_events('(?i)message'),
+                            ('Event_component', '!=', 'mod_chat')]),
+    ('Profile', [('Event_code', 'in', en.get_event_codes('User profile viewed')),
+                 ('Affected_user', '!= column', 'Username')]),
+    ('Social interaction', [('Event_code', 'in', en.get_event_codes('Blog entries viewed')),
+                            ('Affected_user', '!= column', 'Username')])
+]
+
+# rules of redefine_component, applied in order (see backends)
+COMPONENT_RULES = [
+    # assignment
+    ('Assignment', [('Component', 'contains', '(?i)submission')]),
 
-    Args:
-        directory_path: The path of the directory that contains all the logs files.
+    # authentication
+    ('Login', [('Event_code', 'in', en.get_event_codes('User has logged in'))]),
+    ('Login', [('Event_code', 'in', en.get_event_codes('User login failed'))]),
+    ('Logout', [('Event_code', 'in', en.get_event_codes('User logged out'))]),
 
-    Returns:
-        The dataframe containing the logs of the selected students.
-    """
+    # badge
+    ('Badge', [_get_matching_events('Badge')]),
+
+    # blog
+    ('Blog', [_get_matching_events('Blog')]),
 
-    global_table = pd.DataFrame()
+    # book
+    ('Book', [('Component', '==', 'Book printing')]),
+
+    # calendar
+    ('Calendar', [_get_matching_events('Calendar')]),
+
+    # capability
+    ('Capability', [_get_matching_events('Capability')]),
 
-    for file_path in glob.glob(directory_path + '*.csv'):
-        # get the user logs
-        user_logs = get_dataframe(file_path)
-        # concatenate the user logs to the global table
-        global_table = pd.concat([global_table, user_logs], axis=0)
+    # course activity completion updated
+    (('Event_context', 'prefix', ':'),
+     [('Event_code', 'in', en.get_event_codes('Course activity completion updated'))]),
 
-    # reset the index
-    global_table = global_table.reset_index(drop=True)
+    # course home
+    ('Course home', [_get_matching_events('Course section')]),
+    ('Course home', [[[('Event_context', 'contains', 'Course:')], [('courseid', 'not in', [0, 1])]],
+                     ('Event_code', 'in', en.get_event_codes('Course viewed'))]),
 
-    return global_table
+    # course module created
+    (('Event_context', 'prefix', ':'), [('Event_code', 'in', en.get_event_codes('Course module created'))]),
+
+    # course module updated
+    (('Event_context', 'prefix', ':'), [('Event_code', 'in', en.get_event_codes('Course module updated'))]),
 
+    # courses list
+    ('Courses list', [('Event_code', 'in', en.get_event_codes('Category viewed'))]),
+    ('Courses list', [('Event_code', 'in', en.get_event_codes('Courses searched'))]),
+
+    # dashboard
+    ('Dashboard', [_get_matching_events('Dashboard')]),
+
+    # enrollment
+    ('Enrolment', [('Event_code', 'in', en.get_event_codes('User enrolled in course'))]),
+    ('Enrolment', [('Event_code', 'in', en.get_event_codes('User unenrolled from course'))]),
+
+    # grade-book
+    ('Gradebook', [('Component', '==', 'Single view')]),
+    ('Gradebook', [('Component', '==', 'Excel spreadsheet')]),
+    ('Gradebook', [('Component', '==', 'OpenDocument spreadsheet')]),
+    ('Gradebook', [('Component', '==', 'Grader report')]),
+    ('Gradebook', [('Component', '==', 'Outcomes report')]),
+    ('Gradebook', [('Event_code', 'in', en.get_event_codes('User graded'))]),
+    ('Gradebook', [('Event_code', 'in', en.get_event_codes('Grade item updated'))]),
+    ('Gradebook', [('Event_code', 'in', en.get_event_codes('Grade deleted'))]),
+    ('Gradebook', [('Event_code', 'in', en.get_event_codes('Grade item created'))]),
+    ('Gradebook', [('Event_code', 'in', en.get_event_codes('Scale created'))]),
+    ('Gradebook', [('Event_code', 'in', en.get_event_codes('Scale deleted'))]),
+
+    # grades
+    ('Grades', [('Event_code', 'in', en.get_event_codes('Grade overview report viewed'))]),
+    ('Grades', [('Event_code', 'in', en.get_event_codes('Course user report viewed'))]),
+    ('Grades', [('Component', '==', 'User report')]),
 
-def get_joined_logs(platform: str or DataFrame, database: str) -> DataFrame:
+    # groups
+    ('Groups', [_get_matching_events('Group|Grouping'),
+                ('Event_code', 'not in', en.get_event_codes('Group message sent'))]),
+
+    # h5p
+    ('H5P', [('Component', '==', 'H5P Package')]),
+    ('H5P', [_get_matching_events('Content'), ('Event_component', '==', 'core')]),
+
+    # messaging
+    ('Messaging', [_get_matching_events('(?i)message'), ('Event_component', '==', 'core')]),
+
+    # notes
+    ('Notes', [_get_matching_events('(?i)Notes'), ('Event_component', '==', 'core')]),
+
+    # notification
+    ('Notification', [_get_matching_events('Notification')]),
+
+    # profile participant
+    ('Participant profile', [('Event_code', 'in', en.get_event_codes('User list viewed'))]),
+    ('Participant profile', [('Event_code', 'in', en.get_event_codes('User profile viewed')),
+                             ('Username', '!= column', 'Affected_user')]),
+
+    # profile user
+    ('User profile', [('Event_code', 'in', en.get_event_codes('User password updated'))]),
+    ('User profile', [('Event_code', 'in', en.get_event_codes('User updated'))]),
+    ('User profile', [('Event_code', 'in', en.get_event_codes('User profile viewed')),
+                      ('Username', '== column', 'Affected_user')]),
+
+    # quiz
+    ('Quiz', [_get_matching_events('Question'), ('Event_component', '==', 'core')]),
+
+    # report
+    ('Report', [('Component', '==', 'Course participation')]),
+    ('Report', [('Component', '==', 'Activity report')]),
+    ('Report', [('Component', '==', 'Statistics')]),
+    ('Report', [('Component', '==', 'Insights viewed')]),
+
+    # role
+    ('Role', [_get_matching_events('Role')]),
+
+    # tag
+    ('Tag', [_get_matching_events('Tag')]),
+
+    # site home (the site course, whose context is the front page)
+    ('Site home', [[[('Event_context', '==', 'Front page')], [('courseid', '==', 1)]],
+                   ('Event_code', 'in', en.get_event_codes('Course viewed'))]),
+
+    # web service
+    ('Web service', [('Course_Area', '==', 'Mobile')])
+]
+
+# rules of identify_deleted_modules, applied in order (see backends)
+STATUS_RULES = [
+    # the context of a deleted module is displayed as 'Other'; in the other languages, it is the only context outside
+    # the system and the site course whose name is not prefixed with its type (e.g. 'Quiz: ...')
+    ('DELETED', [('Event_context', '==', 'Other')]),
+    ('DELETED', [('Event_context', 'not contains', ': '), ('Event_context', 'not in', ['Front page', 'System']),
+                 ('courseid', 'not in', [0, 1])]),
+    ('Available', [('Status', 'null', None)])
+]
+
+
+def get_joined_logs(platform: str or DataFrame, database: str or DataFrame) -> DataFrame:
     """
     First collect the site logs extracted from the Moodle log generation interface
      (https://your_moodle_site/report/log/index.php?id=0), then the database logs extracted from the table
@@ -65,12 +208,15 @@ def get_joined_logs(platform: str or DataFrame, database: str) -> DataFrame:
     Timestamps are reversed since the first log identifies the first action recorded, whereas the first log extracted
     from Moodle log generation interface represents the last action. Some values may not be merged because the lengths
     of the two files may not be equal (some logs can be missed if you download the two files one after the other),
-    thus they must be aligned. You can either use the dataframe or a filepath.
+    thus they must be aligned. You can either use the dataframes (see loading.load_inputs) or the filepaths.
     Please note that if you want to select specific users, the query for the extraction of database data must be
     filtered with their specific userid.
 
+    The fields 'eventname', 'component', 'action' and 'target' are optional. When available, the event class stored in
+    'eventname' is used to code the events independently of the language of the site (see encoding.encode_events).
+
     Query to extract database data:
-        SELECT id, userid, courseid, relateduserid, timecreated
+        SELECT id, userid, courseid, relateduserid, timecreated, eventname, component, action, target
         FROM mdl_logstore_standard_log
         # WHERE userid = ???
 
@@ -80,23 +226,20 @@ def get_joined_logs(platform: str or DataFrame, database: str) -> DataFrame:
             platform_logs columns: ['Time', 'User full name', 'Affected user', 'Event context', 'Component',
                                     'Event name', 'Description', 'Origin', 'IP address']
 
-        database: str,
-            The path of the data extracted from the database.
-            database_logs columns: ['id', 'userid', 'courseid', 'relateduserid', 'timecreated']
+        database: str or DataFrame,
+            The path of the data extracted from the database or the dataframe read by loading.read_database_data.
+            database_logs columns: ['id', 'userid', 'courseid', 'relateduserid', 'timecreated', 'eventname',
+                                    'component', 'action', 'target']
 
     Returns:
         The dataframe that integrates platform and database logs.
     """
 
-    if isinstance(platform, str):
-        # import the complete set of logs extracted from Moodle log extraction interface
-        platform_logs = get_dataframe(platform)
-    else:
-        # if the parameter is a DataFrame
-        platform_logs = platform
+    # import the complete set of logs extracted from Moodle log extraction interface
+    platform_logs = ld.get_input(platform, ld.get_dataframe)
 
     # import the logs extracted from database
-    database_data = get_dataframe(database, columns=['id', 'userid', 'courseid', 'relateduserid', 'timecreated'])
+    database_data = ld.get_input(database, ld.read_database_data)
 
     # reverse platform logs
     platform_logs = platform_logs[::-1].copy()
@@ -104,7 +247,6 @@ def get_joined_logs(platform: str or DataFrame, database: str) -> DataFrame:
 
     # sort database data
     database_data = database_data.sort_values(by=['timecreated', 'id'])
-    database_data = database_data.replace(to_replace='\\N', value=0)
     database_data = database_data.reset_index(drop=True)
 
     # align the number of records for both dataframes
@@ -124,10 +266,13 @@ def get_joined_logs(platform: str or DataFrame, database: str) -> DataFrame:
     # rename the dataframe columns
     joined_logs = tr.rename_columns(joined_logs)
 
+    # code the events
+    joined_logs = en.encode_events(joined_logs)
+
     return joined_logs
 
 
-def add_course_shortname(df: DataFrame, course_names: str) -> DataFrame:
+def add_course_shortname(df: DataFrame, course_names: str or DataFrame) -> DataFrame:
     """
     Add the shortname of the course based on the courseid extracted from the table 'mdl_course'. By modifying the
     function, it is also possible to add the fullname according to specific requirements. Please be aware that if you
@@ -140,25 +285,23 @@ def add_course_shortname(df: DataFrame, course_names: str) -> DataFrame:
 
     Args:
         df: The dataframe object.
-        course_names: str,
-            The path of the data extracted from the database.
+        course_names: str or DataFrame,
+            The path of the data extracted from the database or the dataframe read by loading.read_course_shortnames.
 
     Returns:
         The dataframe with the shortname field.
     """
 
     # get data
-    course_names = get_dataframe(course_names, columns=['id', 'shortname'])
-    # set data type
-    course_names['id'] = course_names['id'].astype('Int64')
-    course_names['shortname'] = course_names['shortname'].astype('str')
-    shortnames = course_names['shortname']
+    course_names = ld.get_input(course_names, ld.read_course_shortnames)
 
-    for shortname in shortnames:
-        courseid = course_names.loc[course_names['shortname'] == shortname]['id'].values[0]
-        df.loc[df['courseid'] == courseid, 'Course_Area'] = shortname
+    # each shortname is assigned to the first course id listed with it
+    course_names = course_names.drop_duplicates(subset='shortname')
+    shortnames = dict(zip(course_names['id'].tolist(), course_names['shortname'].tolist()))
 
-    return df
+    rules = [(('courseid', 'map', shortnames), [('courseid', 'in', list(shortnames))])]
+
+    return bk.get_frame_backend(df).apply_rules(df, 'Course_Area', rules)
 
 
 def add_year(df: DataFrame) -> DataFrame:
@@ -166,88 +309,25 @@ def add_year(df: DataFrame) -> DataFrame:
     Add the field year to the dataframe.
     """
 
-    df['Year'] = df['Time'].map(lambda x: int(x.split('/')[2].split(',')[0]) + 2000)
-
-    # set data type
-    df['Year'] = df['Year'].astype('int64')
-
-    return df
+    return bk.get_frame_backend(df).set_year(df, 'Year', 'Time')
 
 
 def redefine_course_area(df: DataFrame) -> DataFrame:
     """
     Add the Course_Area field to those records that identify actions performed in the site outside a course and that
-    miss a value.
+    miss a value. The rules are declared in COURSE_AREA_RULES and evaluated by the backend of the dataframe (see
+    backends.get_frame_backend).
     """
 
-    # authentication
-    df.loc[df['Event_name'] == 'User has logged in', 'Course_Area'] = 'Authentication'
-    df.loc[df['Event_name'] == 'User login failed', 'Course_Area'] = 'Authentication'
-    df.loc[df['Event_name'] == 'User logged out', 'Course_Area'] = 'Authentication'
-
-    # mobile
-    df.loc[df['Event_name'].str.contains('Web service'), 'Course_Area'] = 'Mobile'
-
-    # moodle site
-    df.loc[(df['Event_name'] == 'Course module instance list viewed') &
-           (df.courseid == 1), 'Course_Area'] = 'Moodle Site'
-    df.loc[(df['Event_name'] == 'Course module viewed') &
-           (df.courseid == 1), 'Course_Area'] = 'Moodle Site'
-    df.loc[(df['Event_name'] == 'Course viewed') &
-           (df.courseid == 1), 'Course_Area'] = 'Moodle Site'
-    df.loc[(df['Event_name'].str.contains('(?i)subscription')) &
-           (df.courseid == 1), 'Course_Area'] = 'Moodle Site'
-    df.loc[(df['Event_name'].str.contains('(?i)content')) &
-           (df.courseid == 0), 'Course_Area'] = 'Moodle Site'
-    df.loc[df['Event_name'] == 'Courses searched', 'Course_Area'] = 'Moodle Site'
-    df.loc[df['Event_name'].str.contains('Discussion') &
-           (df.courseid == 1), 'Course_Area'] = 'Moodle Site'
-    df.loc[df['Event_name'] == 'Notification viewed', 'Course_Area'] = 'Moodle Site'
-    df.loc[df['Event_name'].str.contains('(?i)category') &
-           (df.courseid == 0), 'Course_Area'] = 'Moodle Site'
-    df.loc[df['Event_name'].str.contains('Calendar'), 'Course_Area'] = 'Moodle Site'
-    df.loc[(df['Event_name'] == 'Blog entries viewed') &
-           (df['Affected_user'] == df['Username']), 'Course_Area'] = 'Moodle Site'
-    df.loc[df['Event_name'].str.contains('Role') &
-           (df.courseid == 1), 'Course_Area'] = 'Moodle Site'
-    df.loc[(df['Event_name'] == 'User report viewed') & (df.courseid == 0), 'Course_Area'] = 'Moodle Site'
-    df.loc[(df['Event_name'] == 'Insights viewed') &
-           (df.courseid == 0), 'Course_Area'] = 'Moodle Site'
-    df.loc[(df['Event_name'] == 'User created'), 'Course_Area'] = 'Moodle Site'
-    df.loc[(df['Event_name'] == 'User deleted'), 'Course_Area'] = 'Moodle Site'
-    df.loc[(df['Event_name'].str.contains('(?i)post')) &
-           (df.courseid == 1), 'Course_Area'] = 'Moodle Site'
-
-    # profile
-    df.loc[(df['Event_name'] == 'Badge viewed') & (df['courseid'] == 0), 'Course_Area'] = 'Profile'
-    df.loc[df['Event_name'].str.contains('Dashboard'), 'Course_Area'] = 'Profile'
-    df.loc[df['Event_name'].str.contains('User password'), 'Course_Area'] = 'Profile'
-    df.loc[df['Event_name'] == 'User updated', 'Course_Area'] = 'Profile'
-    df.loc[(df['Event_name'] == 'User profile viewed') &
-           (df['Affected_user'] == df['Username']), 'Course_Area'] = 'Profile'
-    df.loc[df['Event_name'].str.contains('(?i)tag') &
-           (df.courseid == 0), 'Course_Area'] = 'Profile'
-    df.loc[(df['Event_name'] == 'Course user report viewed') &
-           (df.courseid == 1), 'Course_Area'] = 'Moodle Site'
-    df.loc[(df['Event_name'] == 'Grade overview report viewed') &
-           (df.courseid == 1), 'Course_Area'] = 'Moodle Site'
-
-    # social interaction
-    df.loc[(df['Event_name'].str.contains('(?i)message')) &
-           (df['Component'] != 'Chat'), 'Course_Area'] = 'Social interaction'
-    df.loc[(df['Event_name'] == 'User profile viewed') &
-           (df['Affected_user'] != df['Username']), 'Course_Area'] = 'Profile'
-    df.loc[(df['Event_name'] == 'Blog entries viewed') &
-           (df['Affected_user'] != df['Username']), 'Course_Area'] = 'Social interaction'
-
-    return df
+    return bk.get_frame_backend(df).apply_rules(df, 'Course_Area', COURSE_AREA_RULES)
 
 
 def redefine_component(df: DataFrame) -> DataFrame:
     """
     The component field can be labelled with the 'System' value even though the log is clearly generated when the user
     is performing an action on a specific module. Sometimes some records are recorded on different components even
-    though they are related to the same component. This function redefines the component field.
+    though they are related to the same component. This function redefines the component field. The rules are declared
+    in COMPONENT_RULES and evaluated by the backend of the dataframe (see backends.get_frame_backend).
 
     Args:
         df: the joined dataframe.
@@ -257,145 +337,83 @@ def redefine_component(df: DataFrame) -> DataFrame:
 
     """
 
-    # assignment
-    df.loc[df['Component'].str.contains('(?i)submission'), 'Component'] = 'Assignment'
-
-    # authentication
-    df.loc[df['Event_name'] == 'User has logged in', 'Component'] = 'Login'
-    df.loc[df['Event_name'] == 'User login failed', 'Component'] = 'Login'
-    df.loc[df['Event_name'] == 'User logged out', 'Component'] = 'Logout'
-
-    # badge
-    df.loc[df['Event_name'].str.contains('Badge'), 'Component'] = 'Badge'
-
-    # blog
-    df.loc[df['Event_name'].str.contains('Blog'), 'Component'] = 'Blog'
-
-    # book
-    df.loc[df['Component'] == 'Book printing', 'Component'] = 'Book'
-
-    # calendar
-    df.loc[df['Event_name'].str.contains('Calendar'), 'Component'] = 'Calendar'
-
-    # capability
-    df.loc[df['Event_name'].str.contains('Capability'), 'Component'] = 'Capability'
-
-    # course activity completion updated
-    ccu = list(df.loc[df['Event_name'] == 'Course activity completion updated'].index)
-    for idx in ccu:
-        df.loc[idx, 'Component'] = df.loc[idx, 'Event_context'].split(':')[0]
-
-    # course home
-    df.loc[df['Event_name'].str.contains('Course section'), 'Component'] = 'Course home'
-    df.loc[(df['Event_context'].str.contains('Course:')) &
-           (df['Event_name'] == 'Course viewed'), 'Component'] = 'Course home'
-
-    # course module created
-    cmc = list(df.loc[df['Event_name'] == 'Course module created'].index)
-    for idx in cmc:
-        df.loc[idx, 'Component'] = df.loc[idx, 'Event_context'].split(':')[0]
-
-    # course module updated
-    cmu = list(df.loc[df['Event_name'] == 'Course module updated'].index)
-    for idx in cmu:
-        df.loc[idx, 'Component'] = df.loc[idx, 'Event_context'].split(':')[0]
+    backend = bk.get_frame_backend(df)
+    df = backend.apply_rules(df, 'Component', COMPONENT_RULES)
 
-    # courses list
-    df.loc[df['Event_name'] == 'Category viewed', 'Component'] = 'Courses list'
-    df.loc[df['Event_name'] == 'Courses searched', 'Component'] = 'Courses list'
-
-    # dashboard
-    df.loc[df['Event_name'].str.contains('Dashboard'), 'Component'] = 'Dashboard'
-
-    # enrollment
-    df.loc[df['Event_name'] == 'User enrolled in course', 'Component'] = 'Enrolment'
-    df.loc[df['Event_name'] == 'User unenrolled from course', 'Component'] = 'Enrolment'
-
-    # grade-book
-    df.loc[df['Component'] == 'Single view', 'Component'] = 'Gradebook'
-    df.loc[df['Component'] == 'Excel spreadsheet', 'Component'] = 'Gradebook'
-    df.loc[df['Component'] == 'OpenDocument spreadsheet', 'Component'] = 'Gradebook'
-    df.loc[df['Component'] == 'Grader report', 'Component'] = 'Gradebook'
-    df.loc[df['Component'] == 'Outcomes report', 'Component'] = 'Gradebook'
-    df.loc[df['Event_name'] == 'User graded', 'Component'] = 'Gradebook'
-    df.loc[df['Event_name'] == 'Grade item updated', 'Component'] = 'Gradebook'
-    df.loc[df['Event_name'] == 'Grade deleted', 'Component'] = 'Gradebook'
-    df.loc[df['Event_name'] == 'Grade item created', 'Component'] = 'Gradebook'
-    df.loc[df['Event_name'] == 'Scale created', 'Component'] = 'Gradebook'
-    df.loc[df['Event_name'] == 'Scale deleted', 'Component'] = 'Gradebook'
-
-    # grades
-    df.loc[df['Event_name'] == 'Grade overview report viewed', 'Component'] = 'Grades'
-    df.loc[df['Event_name'] == 'Course user report viewed', 'Component'] = 'Grades'
-    df.loc[df['Component'] == 'User report', 'Component'] = 'Grades'
+    # messaging: invert username with affected user (no component rule depends on these fields for this event)
+    df = backend.swap_values(df, [('Event_code', 'in', en.get_event_codes('Message contact added'))],
+                             [('Username', 'Affected_user'), ('userid', 'relateduserid')])
+    df = backend.to_integer(df, ['userid', 'relateduserid'])
 
-    # groups
-    df.loc[(df['Event_name'].str.contains('Group|Grouping')) &
-           (df['Event_name'] != 'Group message sent'), 'Component'] = 'Groups'
+    return df
 
-    # h5p
-    df.loc[df['Component'] == 'H5P Package', 'Component'] = 'H5P'
-    df.loc[(df['Event_name'].str.contains('Content')) & (df['Component'] == 'System'), 'Component'] = 'H5P'
 
-    # messaging
-    df.loc[(df['Event_name'].str.contains('(?i)message')) & (df['Component'] == 'System'), 'Component'] = 'Messaging'
-    mca = list(df.loc[df['Event_name'] == 'Message contact added'].index)
-    for idx in mca:
-        # invert username with affected user
-        df.loc[idx, ['Username', 'Affected_user']] = df.loc[idx, ['Affected_user', 'Username']].values
-        df.loc[idx, ['userid', 'relateduserid']] = df.loc[idx, ['relateduserid', 'userid']].values
+def _get_course_user_keys(courseid: Series, userid: Series) -> np.ndarray:
+    """
+    Combine course ids and user ids into a single integer key.
+    """
 
-    df['userid'] = np.floor(pd.to_numeric(df['userid'], errors='coerce')).astype('int64')
-    df['relateduserid'] = np.floor(pd.to_numeric(df['relateduserid'], errors='coerce')).astype('int64')
+    return courseid.to_numpy('int64') * (1 << 32) + userid.to_numpy('int64')
 
-    # notes
-    df.loc[(df['Event_name'].str.contains('(?i)Notes')) & (df['Component'] == 'System'), 'Component'] = 'Notes'
 
-    # notification
-    df.loc[df['Event_name'].str.contains('Notification'), 'Component'] = 'Notification'
+def _get_course_role_mask(df: DataFrame, course_role: DataFrame) -> np.ndarray:
+    """
+    Return the mask of the logs performed by the users having the course role. If the role data contain the fields
+    'timestart' and 'timeend', only the logs recorded within the enrolment periods are selected.
 
-    # profile participant
-    df.loc[df['Event_name'] == 'User list viewed', 'Component'] = 'Participant profile'
-    df.loc[(df['Event_name'] == 'User profile viewed') &
-           (df['Username'] != df['Affected_user']), 'Component'] = 'Participant profile'
+    Args:
+        df: the joined dataframe, of any backend.
+        course_role: The course ids and user ids (and optionally the enrolment periods) of the role.
 
-    # profile user
-    df.loc[df['Event_name'] == 'User password updated', 'Component'] = 'User profile'
-    df.loc[df['Event_name'] == 'User updated', 'Component'] = 'User profile'
-    df.loc[(df['Event_name'] == 'User profile viewed') &
-           (df['Username'] == df['Affected_user']), 'Component'] = 'User profile'
+    Returns:
+        The boolean mask of the logs.
+    """
 
-    # quiz
-    df.loc[(df['Event_name'].str.contains('Question')) & (df['Component'] == 'System'), 'Component'] = 'Quiz'
+    # only numeric fields of the logs are read, which both backends return as numpy arrays without copying the values
+    backend = bk.get_frame_backend(df)
+    course_role = course_role.dropna(subset=['courseid', 'userid'])
+    log_keys = _get_course_user_keys(pd.Series(backend.get_array(df, 'courseid')),
+                                     pd.Series(backend.get_array(df, 'userid')))
+    role_keys = _get_course_user_keys(course_role['courseid'], course_role['userid'])
 
-    # report
-    df.loc[df['Component'] == 'Course participation', 'Component'] = 'Report'
-    df.loc[df['Component'] == 'Activity report', 'Component'] = 'Report'
-    df.loc[df['Component'] == 'Statistics', 'Component'] = 'Report'
-    df.loc[df['Component'] == 'Insights viewed', 'Component'] = 'Report'
+    if 'timestart' not in course_role.columns:
+        # the role is valid for the whole period
+        return np.isin(log_keys, role_keys)
 
-    # role
-    df.loc[df['Event_name'].str.contains('Role'), 'Component'] = 'Role'
+    # enrolment periods, 0 means no start or no end
+    periods = pd.DataFrame({'key': role_keys,
+                            'timestart': course_role['timestart'].fillna(0).to_numpy('int64'),
+                            'timeend': course_role['timeend'].fillna(0).to_numpy('int64')})
+    periods.loc[periods['timeend'] == 0, 'timeend'] = np.iinfo(np.int64).max
+    periods = periods.sort_values(['key', 'timestart']).reset_index(drop=True)
 
-    # tag
-    df.loc[(df['Event_name'].str.contains('Tag')), 'Component'] = 'Tag'
+    # merge the overlapping periods of the same user in the same course, so that they are disjoint
+    previous_end = periods.groupby('key')['timeend'].cummax().groupby(periods['key']).shift()
+    new_period = previous_end.isnull() | (periods['timestart'] > previous_end)
+    periods = periods.groupby([periods['key'], new_period.cumsum()]).agg(timestart=('timestart', 'min'),
+                                                                          timeend=('timeend', 'max'))
+    periods = periods.reset_index(level=0).sort_values('timestart')
 
-    # site home
-    df.loc[(df['Event_context'] == 'Front page') & (df['Event_name'] == 'Course viewed'), 'Component'] = 'Site home'
+    # find the last period started before each log
+    logs = pd.DataFrame({'key': log_keys, 'Unix_Time': backend.get_array(df, 'Unix_Time').astype('int64'),
+                         'row': np.arange(len(df))})
+    logs = logs.sort_values('Unix_Time', kind='stable')
+    logs = pd.merge_asof(logs, periods, left_on='Unix_Time', right_on='timestart', by='key', direction='backward')
 
-    # web service
-    df.loc[df['Course_Area'] == 'Mobile', 'Component'] = 'Web service'
+    # keep the logs recorded before the end of the period
+    mask = np.zeros(len(df), dtype=bool)
+    mask[logs.loc[logs['Unix_Time'] < logs['timeend'], 'row'].to_numpy()] = True
 
-    return df
+    return mask
 
 
 def add_role(df: DataFrame,
-             student_role: str,
-             teacher_role: str = '',
-             non_editing_teacher_role: str = '',
-             course_creator_role: str = '',
-             manager_role: str = '',
-             admin_role: str = '') -> DataFrame:
+             student_role: str or DataFrame,
+             teacher_role: str or DataFrame = '',
+             non_editing_teacher_role: str or DataFrame = '',
+             course_creator_role: str or DataFrame = '',
+             manager_role: str or DataFrame = '',
+             admin_role: str or DataFrame = '') -> DataFrame:
 
     """
     Add roles to the dataframe.
@@ -416,6 +434,17 @@ def add_role(df: DataFrame,
         LEFT OUTER JOIN mdl_role_assignments ra ON cx.id = ra.contextid AND ra.roleid = '???' AND cx.instanceid <> 1
         LEFT OUTER JOIN mdl_user u ON ra.userid = u.id Where cx.contextlevel = '50'
 
+    A course role is valid for the whole period of the logs, unless the role data contain the fields 'timestart' and
+    'timeend' of the enrolment (Unix timestamps, a 'timeend' of 0 meaning no end). In this case, the role is assigned
+    only to the logs recorded within the enrolment period, so that users who changed role or were unenrolled during the
+    year are not mislabelled. Roles are assigned by a sorted interval join on (courseid, userid, Unix_Time).
+
+    Query for time-bounded student, teacher, and non-editing teacher:
+        SELECT e.courseid, ue.userid, ue.timestart, ue.timeend
+        FROM mdl_user_enrolments ue JOIN mdl_enrol e ON ue.enrolid = e.id
+        JOIN mdl_context cx ON cx.instanceid = e.courseid AND cx.contextlevel = '50'
+        JOIN mdl_role_assignments ra ON ra.contextid = cx.id AND ra.userid = ue.userid AND ra.roleid = '???'
+
     Query for manager and course creator:
         SELECT distinct userid
         FROM mdl_role_assignments
@@ -426,6 +455,9 @@ def add_role(df: DataFrame,
         FROM mdl_config
         WHERE name = 'siteadmins'
 
+    Each role can be given either as the path of the data extracted from the database or as the dataframe read by
+    the corresponding function of the loading module (read_course_role, read_system_role, read_admin_role).
+
     Args:
         df: the joined dataframe.
         student_role: str,
@@ -450,77 +482,56 @@ def add_role(df: DataFrame,
         The joined dataframe with the role integration.
     """
 
+    backend = bk.get_frame_backend(df)
+    rules = []
+
     # get data
-    student_role = get_dataframe(student_role, columns=['courseid', 'userid'])
-    # set data type
-    student_role['courseid'] = student_role['courseid'].astype('Int64')
-    student_role['userid'] = student_role['userid'].astype('Int64')
+    student_role = ld.get_input(student_role, ld.read_course_role)
     # assign the course student role by matching the course id and the user id
-    for idx in range(len(student_role)):
-        df.loc[(df['courseid'] == student_role.iloc[idx]['courseid']) &
-               (df['userid'] == student_role.iloc[idx]['userid']), 'Role'] = 'Student'
-
-    if teacher_role != '':
-        # get data
-        teacher_role = get_dataframe(teacher_role, columns=['courseid', 'userid'])
-        # set data type
-        teacher_role['courseid'] = teacher_role['courseid'].astype('Int64')
-        teacher_role['userid'] = teacher_role['userid'].astype('Int64')
+    rules.append(('Student', [_get_course_role_mask(df, student_role)]))
+
+    # get data
+    teacher_role = ld.get_input(teacher_role, ld.read_course_role)
+    if teacher_role is not None:
         # assign the course teacher role by matching the course id and the user id
-        for idx in range(len(teacher_role)):
-            df.loc[(df['courseid'] == teacher_role.iloc[idx]['courseid']) &
-                   (df['userid'] == teacher_role.iloc[idx]['userid']), 'Role'] = 'Teacher'
-
-    if non_editing_teacher_role != '':
-        # get data
-        non_editing_teacher_role = get_dataframe(non_editing_teacher_role, columns=['courseid', 'userid'])
-        # set data type
-        non_editing_teacher_role['courseid'] = non_editing_teacher_role['courseid'].astype('Int64')
-        non_editing_teacher_role['userid'] = non_editing_teacher_role['userid'].astype('Int64')
+        rules.append(('Teacher', [_get_course_role_mask(df, teacher_role)]))
+
+    # get data
+    non_editing_teacher_role = ld.get_input(non_editing_teacher_role, ld.read_course_role)
+    if non_editing_teacher_role is not None:
         #  assign the course non-editing teacher role by matching the course id and the user id
-        for idx in range(len(non_editing_teacher_role)):
-            df.loc[(df['courseid'] == non_editing_teacher_role.iloc[idx]['courseid']) &
-                   (df['userid'] == non_editing_teacher_role.iloc[idx]['userid']), 'Role'] = 'Non-editing Teacher'
-
-    #  assign the course creator role
-    if course_creator_role != '':
-        # get data
-        course_creator_role = get_dataframe(course_creator_role, columns=['userid'])
-        # set data type
-        course_creator_role['userid'] = course_creator_role['userid'].astype('Int64')
-        for idx in range(len(course_creator_role)):
-            df.loc[df['userid'] == course_creator_role.iloc[idx]['userid'], 'Role'] = 'Course creator'
-
-    if manager_role != '':
-        # get data
-        manager_role = get_dataframe(manager_role, columns=['userid'])
-        # set data type
-        manager_role['userid'] = manager_role['userid'].astype('Int64')
+        rules.append(('Non-editing Teacher', [_get_course_role_mask(df, non_editing_teacher_role)]))
+
+    # get data
+    course_creator_role = ld.get_input(course_creator_role, ld.read_system_role)
+    if course_creator_role is not None:
+        #  assign the course creator role
+        rules.append(('Course creator', [('userid', 'in', course_creator_role['userid'].dropna().to_numpy())]))
+
+    # get data
+    manager_role = ld.get_input(manager_role, ld.read_system_role)
+    if manager_role is not None:
         # assign the manager role
-        for idx in range(len(manager_role)):
-            df.loc[(df['Role'].isnull()) & (df['userid'] == manager_role.iloc[idx]['userid']), 'Role'] = 'Manager'
-
-    if admin_role != '':
-        # get data
-        admin_role = get_dataframe(admin_role, columns=['value'])
-        # get userid whose role is admin
-        admin_role = admin_role['value'][0].split(',')
+        rules.append(('Manager', [('Role', 'null', None),
+                                  ('userid', 'in', manager_role['userid'].dropna().to_numpy())]))
+
+    # get data
+    admin_role = ld.get_input(admin_role, ld.read_admin_role)
+    if admin_role is not None:
         # assign the admin role
-        for idx in admin_role:
-            df.loc[(df['Role'].isnull()) & (df['userid'] == int(idx)), 'Role'] = 'Admin'
+        rules.append(('Admin', [('Role', 'null', None), ('userid', 'in', admin_role['userid'].dropna().to_numpy())]))
 
     # assign the role 'guest' to guests and users who access the course just to have a look and then unenroll
-    df.loc[df['userid'] == 1, 'Role'] = 'Guest'
-    courseids = df.loc[df.Course_Area.notnull()]['courseid'].unique()
-    for courseid in courseids:
-        if courseid > 1:
-            df.loc[(df['Role'].isnull()) & (df.courseid == courseid) & (df['Username'] != '-'), 'Role'] = 'Guest'
+    rules.append(('Guest', [('userid', '==', 1)]))
+    courseids = backend.get_array(df, 'courseid')[pd.notnull(backend.get_array(df, 'Course_Area'))]
+    courseids = pd.unique(courseids)
+    rules.append(('Guest', [('Role', 'null', None), ('courseid', 'in', courseids[courseids > 1]),
+                            ('Username', '!=', '-')]))
 
     # assign the authenticated user to left records
-    df.loc[(df['Role'].isnull()) &
-           (df['Username'] != '-'), 'Role'] = 'Authenticated user'
+    rules.append(('Authenticated user', [('Role', 'null', None), ('Username', '!=', '-')]))
 
-    return df
+    return backend.apply_rules(df, 'Role', rules)
 
 
 def identify_deleted_modules(df: DataFrame) -> DataFrame:
@@ -534,7 +545,4 @@ def identify_deleted_modules(df: DataFrame) -> DataFrame:
         The dataframe with the type values: DELETED or Available.
     """
 
-    df.loc[df['Event_context'] == 'Other', 'Status'] = 'DELETED'
-    df.loc[df['Status'].isnull(), 'Status'] = 'Available'
-
-    return df
+    return bk.get_frame_backend(df).apply_rules(df, 'Status', STATUS_RULES)
@@ -0,0 +1,530 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import pandas as pd
+from pandas import DataFrame
+import src.algorithms.transforming as tr
+import bz2
+import collections
+import csv
+import glob
+import gzip
+import hashlib
+import heapq
+import io
+import itertools
+import lzma
+import os
+import re
+import shutil
+import subprocess
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# external decompressors by file extension, in order of preference; multi-threaded tools come first and, running in a
+# separate process, they decompress while pandas is parsing
+DECOMPRESSORS = {'.gz': [['pigz', '-dc'], ['gzip', '-dc']],
+                 '.bz2': [['lbzip2', '-dc'], ['pbzip2', '-dc'], ['bzip2', '-dc']],
+                 '.xz': [['xz', '-dc', '-T0']],
+                 '.zst': [['zstd', '-dc']]}
+
+# extensions of the files that can be read
+SUFFIXES = ['.csv'] + ['.csv' + suffix for suffix in DECOMPRESSORS]
+
+
+def _open_with_python(file_path: str, suffix: str) -> io.BufferedIOBase:
+    """
+    Open a compressed file with the Python decompressors.
+    """
+
+    if suffix == '.gz':
+        return gzip.open(file_path, 'rb')
+    if suffix == '.bz2':
+        return bz2.open(file_path, 'rb')
+    if suffix == '.xz':
+        return lzma.open(file_path, 'rb')
+    if zstandard is None:
+        raise ImportError("Reading '.zst' files requires the zstd command or the zstandard package.")
+
+    return zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+
+
+@contextmanager
+def open_input(file_path: str):
+    """
+    Open an input file for reading, decompressing '.gz', '.bz2', '.xz' and '.zst' files on the fly. The decompressed
+    data are streamed, so that they are never written to disk. A multi-threaded external decompressor (e.g. pigz) is
+    used if available, otherwise the Python modules are used. This function can be used by any reader that parses the
+    inputs in chunks.
+
+    Args:
+        file_path: The path of the file.
+
+    Returns:
+        The binary file object.
+    """
+
+    suffix = os.path.splitext(file_path)[1].lower()
+
+    if suffix not in DECOMPRESSORS:
+        with open(file_path, 'rb') as file:
+            yield file
+        return
+
+    command = next((command for command in DECOMPRESSORS[suffix] if shutil.which(command[0])), None)
+    if command is None:
+        with _open_with_python(file_path, suffix) as file:
+            yield file
+        return
+
+    process = subprocess.Popen(command + [file_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    complete = False
+    try:
+        yield process.stdout
+        # the stream may have been left unread (e.g. only the header was needed)
+        complete = process.stdout.read(1) == b''
+    finally:
+        if not complete:
+            process.kill()
+        process.stdout.close()
+        _, error = process.communicate()
+
+    if complete and process.returncode != 0:
+        raise OSError(f"Cannot decompress {file_path}: {error.decode(errors='replace').strip()}")
+
+
+def _read_first_values(file_path: str) -> [str]:
+    """
+    Return the values of the first line of the file.
+    """
+
+    with open_input(file_path) as file:
+        first_line = file.readline().decode('utf-8-sig')
+
+    return next(csv.reader([first_line]), [''])
+
+
+def get_dataframe(file_path: str, columns: [] = None, usecols: [str] = None) -> DataFrame:
+    """
+    Read the dataframe and add columns if missing. Compressed files ('.gz', '.bz2', '.xz', '.zst') are decompressed
+    while they are parsed.
+
+    Args:
+        file_path: The path of the dataframe object.
+        columns: The list of column names.
+        usecols: The list of columns to read; the other columns are skipped while parsing. All the columns are read by
+            default.
+
+    Returns:
+        The dataframe with column names.
+    """
+
+    first_values = _read_first_values(file_path)
+
+    # the column names are missing if the first value is an integer
+    try:
+        int(first_values[0])
+        has_header = False
+    except (ValueError, IndexError):
+        has_header = True
+
+    # add column names if missing, trailing optional columns may be missing
+    names = None if has_header else columns[:len(first_values)]
+    # skip the unused columns, ignoring those that are not in the file
+    selected = None if usecols is None else (lambda name: name in usecols)
+
+    with open_input(file_path) as file:
+        df = pd.read_csv(file, sep=',', header=0 if has_header else None, names=names, usecols=selected)
+
+    return df
+
+
+def collect_user_logs(directory_path: str, usecols: [str] = None) -> DataFrame:
+    """
+    It is possible to choose specific users (within one or more courses) and download their logs. Then, a directory
+    should contain all related files, either plain or compressed '.csv' files.
+
+    Args:
+        directory_path: The path of the directory that contains all the logs files.
+        usecols: The list of columns to read; all the columns are read by default.
+
+    Returns:
+        The dataframe containing the logs of the selected students.
+    """
+
+    file_paths = [file_path for suffix in SUFFIXES for file_path in glob.glob(directory_path + '*' + suffix)]
+
+    # get the user logs
+    user_logs = [get_dataframe(file_path, usecols=usecols) for file_path in file_paths]
+    # concatenate the user logs to the global table
+    global_table = pd.concat(user_logs, axis=0) if len(user_logs) > 0 else pd.DataFrame()
+
+    # reset the index
+    global_table = global_table.reset_index(drop=True)
+
+    return global_table
+
+
+class _StreamReader(io.RawIOBase):
+    """
+    Binary file object that reads the chunks of bytes produced by an iterator, so that pandas can parse a stream of
+    rows without materialising it.
+    """
+
+    def __init__(self, chunks):
+        super().__init__()
+        self._chunks = chunks
+        self._buffer = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while len(self._buffer) == 0:
+            self._buffer = next(self._chunks, None)
+            if self._buffer is None:
+                self._buffer = b''
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+
+        return size
+
+
+def _get_time_key(time: str) -> tuple:
+    """
+    Return a sortable key for the time of a platform log (e.g. '23/01/23, 12:09' is day/month/year, hour:minute).
+    """
+
+    values = [int(value) for value in re.findall(r'\d+', time)]
+
+    return tuple(values[2::-1] + values[3:])
+
+
+def _read_log_groups(file_path: str, header: [str]):
+    """
+    Read the platform logs of an export and yield them grouped by time, as (time key, rows).
+    """
+
+    with open_input(file_path) as file:
+        rows = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+        file_header = next(rows)
+        if file_header != header:
+            raise ValueError(f"The columns of {file_path} differ from those of the other exports.")
+        time_column = header.index('Time')
+        for key, group in itertools.groupby(rows, key=lambda row: _get_time_key(row[time_column])):
+            yield key, list(group)
+
+
+def _get_row_hash(row: [str]) -> bytes:
+    """
+    Return the hash of a row.
+    """
+
+    return hashlib.blake2b('\x1f'.join(row).encode(), digest_size=16).digest()
+
+
+def _merge_log_groups(file_paths: [str], header: [str]):
+    """
+    Merge the platform logs of several exports in time order and yield them as chunks of CSV lines. The exports are
+    ordered from the last to the first log, as extracted from Moodle. Logs recorded at the same time in several exports
+    are duplicates: for each row, the number of copies kept is the largest number of copies found in a single export,
+    so that identical logs recorded within the same minute are not lost.
+    """
+
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow(header)
+
+    # k-way merge of the exports, one group of logs with the same time at a time
+    groups = heapq.merge(*[_read_log_groups(file_path, header) for file_path in file_paths],
+                         key=lambda group: group[0], reverse=True)
+    for _, same_time_groups in itertools.groupby(groups, key=lambda group: group[0]):
+        same_time_groups = sorted([rows for _, rows in same_time_groups], key=len, reverse=True)
+        # the largest group gives the order of the logs
+        rows = same_time_groups[0]
+        if len(same_time_groups) > 1:
+            counts = collections.Counter(_get_row_hash(row) for row in rows)
+            for other_rows in same_time_groups[1:]:
+                other_counts = collections.Counter()
+                for row in other_rows:
+                    row_hash = _get_row_hash(row)
+                    other_counts[row_hash] += 1
+                    # add the copies missing from the largest group
+                    if other_counts[row_hash] > counts[row_hash]:
+                        counts[row_hash] += 1
+                        rows.append(row)
+        writer.writerows(rows)
+        yield output.getvalue().encode()
+        output.seek(0)
+        output.truncate()
+
+
+def merge_platform_logs(file_paths: [str], usecols: [str] = None) -> DataFrame:
+    """
+    Merge platform logs exported in several files with overlapping date ranges (the Moodle log generation interface
+    limits the size of an export). The exports are merged in time order by a streaming k-way merge, and the logs
+    duplicated in the overlapping ranges are dropped by comparing row hashes, keeping in memory only the logs recorded
+    at the same time. The merged logs are ordered from the last to the first, like a single export.
+
+    Args:
+        file_paths: The paths of the exports, plain or compressed.
+        usecols: The list of columns to read; all the columns are read by default.
+
+    Returns:
+        The dataframe containing the merged logs.
+    """
+
+    header = _read_first_values(file_paths[0])
+    # skip the unused columns
+    selected = None if usecols is None else (lambda name: name in usecols)
+
+    stream = io.BufferedReader(_StreamReader(_merge_log_groups(file_paths, header)))
+    df = pd.read_csv(stream, sep=',', usecols=selected)
+
+    return df
+
+
+def read_platform_logs(file_paths: str or [str], usecols: [str] = None) -> DataFrame:
+    """
+    Read the platform logs extracted from the Moodle log generation interface, merging them if they are exported in
+    several files (see merge_platform_logs).
+
+    Args:
+        file_paths: The path of the platform logs, or the list of paths of several exports.
+        usecols: The list of columns to read; all the columns are read by default.
+
+    Returns:
+        The platform logs.
+    """
+
+    if isinstance(file_paths, str):
+        return get_dataframe(file_paths, usecols=usecols)
+    if len(file_paths) == 1:
+        return get_dataframe(file_paths[0], usecols=usecols)
+
+    return merge_platform_logs(file_paths, usecols=usecols)
+
+
+def read_database_data(file_path: str, usecols: [str] = None) -> DataFrame:
+    """
+    Read the data extracted from the table 'mdl_logstore_standard_log' and set the data types. Missing values ('\\N')
+    are replaced with 0.
+
+    Args:
+        file_path: The path of the data extracted from the database.
+        usecols: The list of columns to read; all the columns are read by default. The fields 'id' and 'timecreated'
+            are always read.
+
+    Returns:
+        The database data.
+    """
+
+    if usecols is not None:
+        usecols = set(usecols) | {'id', 'timecreated'}
+
+    # get data
+    database_data = get_dataframe(file_path, columns=['id', 'userid', 'courseid', 'relateduserid', 'timecreated',
+                                                      'eventname', 'component', 'action', 'target'], usecols=usecols)
+    database_data = database_data.replace(to_replace='\\N', value=0)
+    # set data type
+    for column in ['id', 'userid', 'courseid', 'relateduserid', 'timecreated']:
+        if column in database_data.columns:
+            database_data[column] = pd.to_numeric(database_data[column]).astype('int64')
+
+    return database_data
+
+
+def read_course_shortnames(file_path: str) -> DataFrame:
+    """
+    Read the course shortnames extracted from the table 'mdl_course' and set the data types.
+
+    Args:
+        file_path: The path of the data extracted from the database.
+
+    Returns:
+        The course ids and shortnames.
+    """
+
+    # get data
+    course_names = get_dataframe(file_path, columns=['id', 'shortname'])
+    # set data type
+    course_names['id'] = course_names['id'].astype('Int64')
+    course_names['shortname'] = course_names['shortname'].astype('str')
+
+    return course_names
+
+
+def read_course_role(file_path: str) -> DataFrame:
+    """
+    Read the users having a role within a course (student, teacher, non-editing teacher) and set the data types. The
+    fields 'timestart' and 'timeend' of the enrolment are optional.
+
+    Args:
+        file_path: The path of the data extracted from the database.
+
+    Returns:
+        The course ids and user ids, and the enrolment periods if available.
+    """
+
+    # get data
+    course_role = get_dataframe(file_path, columns=['courseid', 'userid', 'timestart', 'timeend'])
+    # set data type
+    for column in ['courseid', 'userid', 'timestart', 'timeend']:
+        if column in course_role.columns:
+            course_role[column] = course_role[column].astype('Int64')
+
+    return course_role
+
+
+def read_system_role(file_path: str) -> DataFrame:
+    """
+    Read the users having a system role (manager, course creator) and set the data types.
+
+    Args:
+        file_path: The path of the data extracted from the database.
+
+    Returns:
+        The user ids.
+    """
+
+    # get data
+    system_role = get_dataframe(file_path, columns=['userid'])
+    # set data type
+    system_role['userid'] = system_role['userid'].astype('Int64')
+
+    return system_role
+
+
+def read_admin_role(file_path: str) -> DataFrame:
+    """
+    Read the comma-separated list of admin ids extracted from the table 'mdl_config'.
+
+    Args:
+        file_path: The path of the data extracted from the database.
+
+    Returns:
+        The user ids.
+    """
+
+    # get data
+    admin_role = get_dataframe(file_path, columns=['value'])
+    # get userid whose role is admin
+    admin_role = pd.DataFrame({'userid': [int(idx) for idx in str(admin_role['value'][0]).split(',')]})
+    # set data type
+    admin_role['userid'] = admin_role['userid'].astype('Int64')
+
+    return admin_role
+
+
+def read_deleted_users(file_path: str) -> DataFrame:
+    """
+    Read the ids of the deleted users extracted from the table 'mdl_user' and set the data types.
+
+    Args:
+        file_path: The path of the data extracted from the database.
+
+    Returns:
+        The user ids.
+    """
+
+    # get data
+    deleted_users = get_dataframe(file_path, columns=['id'])
+    # set data types
+    deleted_users['id'] = deleted_users['id'].astype('Int64')
+
+    return deleted_users
+
+
+def read_consolidated_data(file_path: str) -> DataFrame:
+    """
+    Read a consolidated dataframe saved in CSV format (see get_consolidated_data), dropping the saved index.
+
+    Args:
+        file_path: The path of the consolidated data.
+
+    Returns:
+        The consolidated dataframe.
+    """
+
+    # get data
+    df = get_dataframe(file_path)
+    # drop the saved index
+    df = df.loc[:, ~df.columns.str.startswith('Unnamed:')]
+
+    return df
+
+
+def get_input(data: str or DataFrame, reader) -> DataFrame or None:
+    """
+    Return an input of the consolidation, reading it if a path is given.
+
+    Args:
+        data: The path of the input, its dataframe, or an empty string (or None) if the input is not provided.
+        reader: The function used to read the input (e.g. read_course_role).
+
+    Returns:
+        The dataframe, or None if the input is not provided.
+    """
+
+    if data is None or isinstance(data, str) and data == '':
+        return None
+    if isinstance(data, str):
+        return reader(data)
+
+    return data
+
+
+# the reader of each input of get_consolidated_data
+READERS = {'platform_logs': read_platform_logs,
+           'database_data': read_database_data,
+           'course_shortnames': read_course_shortnames,
+           'student_role': read_course_role,
+           'teacher_role': read_course_role,
+           'non_editing_teacher_role': read_course_role,
+           'course_creator_role': read_system_role,
+           'manager_role': read_system_role,
+           'admin_role': read_admin_role,
+           'deleted_users': read_deleted_users,
+           'directory': collect_user_logs}
+
+
+def load_inputs(max_workers: int = None, columns: [str] = None, **inputs: str) -> dict:
+    """
+    Read and type-cast all the inputs of the consolidation concurrently, so that the ingestion time approaches the
+    reading time of the largest file. Inputs given as an empty string are skipped.
+
+    Args:
+        max_workers: The maximum number of threads; by default one per input.
+        columns: The (renamed) columns of the logs needed by the consolidation, e.g. ['Username', 'Unix_Time']; the
+            other columns of the platform logs and of the database data are not read. All the columns are read by
+            default.
+        inputs: The paths of the inputs, named as the parameters of get_consolidated_data (e.g.
+            database_data='src/datasets/example_database_data.csv'); the platform logs can be a list of exports.
+
+    Returns:
+        The dictionary of the parsed dataframes, by input name.
+    """
+
+    # inputs to read
+    paths = {name: path for name, path in inputs.items()
+             if isinstance(path, list) or isinstance(path, str) and path != ''}
+    if len(paths) == 0:
+        return {}
+
+    # columns to read from the log files
+    usecols = None if columns is None else tr.get_source_columns(columns)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(paths)) as executor:
+        futures = {}
+        for name, path in paths.items():
+            if name in ['platform_logs', 'database_data', 'directory']:
+                futures[name] = executor.submit(READERS[name], path, usecols=usecols)
+            else:
+                futures[name] = executor.submit(READERS[name], path)
+        tables = {name: future.result() for name, future in futures.items()}
+
+    return tables
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+import warnings
+
+# maximum number of activity-volume strata
+STRATA = 10
+
+# relative difference between the actual and the requested sample fractions above which a warning is issued
+FRACTION_TOLERANCE = 0.05
+
+# fields identifying the event streams kept whole by the sample
+SAMPLE_KEYS = {'user': 'userid', 'course': 'courseid'}
+
+
+def sample_logs(df: DataFrame, fraction: float, by: str = 'user', seed: int = 0) -> DataFrame:
+    """
+    Select a stratified sample of users (or courses), keeping all the logs of the selected users (or courses), so that
+    the role assignment and the analyses of the event streams remain valid on the sample. Users are divided into strata
+    of similar activity volume (number of logs), and the same fraction of the users of each stratum is selected, so
+    that both the very active and the occasional users are represented. The number of strata is limited so that each
+    one has at least 1 / fraction users, and the round(fraction * number of users) selected users are split across the
+    strata by the largest remainder method, so that the sample is not larger than requested. A warning is issued if
+    the actual fraction differs from the requested one (e.g. for 10% of 6 courses, 1 course is selected).
+
+    Each log is weighted by the inverse of the sampling fraction of its stratum (field 'Sample_weight'): the weighted
+    counts of the sample estimate the counts of the full data (see estimate_distribution).
+
+    Args:
+        df: The joined dataframe.
+        fraction: The fraction of the users (or courses) to select, between 0 and 1.
+        by: 'user' or 'course'.
+        seed: The seed of the random selection; the same seed selects the same sample.
+
+    Returns:
+        The logs of the selected users (or courses), with the 'Sample_weight' field.
+    """
+
+    if not 0 < fraction <= 1:
+        raise ValueError(f"The sample fraction must be between 0 and 1: {fraction}")
+    if by not in SAMPLE_KEYS:
+        raise ValueError(f"Unknown sample key: {by}")
+
+    # number of logs of each user (or course)
+    keys = df[SAMPLE_KEYS[by]]
+    volumes = keys.value_counts(sort=False).sort_index()
+    if len(volumes) == 0:
+        # nothing to select (e.g. an empty shard)
+        return df.assign(Sample_weight=pd.Series(dtype='float64')).reset_index(drop=True)
+
+    # strata of activity volume, of at least 1 / fraction users each
+    n_strata = min(STRATA, max(1, int(np.floor(fraction * len(volumes) + 1e-9))))
+    strata = pd.qcut(volumes.rank(method='first'), q=n_strata, labels=False).to_numpy()
+
+    # split the selected users across the strata in proportion to their sizes (largest remainder method)
+    sizes = np.bincount(strata, minlength=n_strata)
+    total = max(1, int(round(fraction * len(volumes))))
+    quotas = total * sizes / len(volumes)
+    counts = np.floor(quotas).astype(np.int64)
+    largest = np.argsort(-(quotas - counts), kind='stable')[:total - counts.sum()]
+    counts[largest] += 1
+
+    actual = total / len(volumes)
+    if abs(actual - fraction) > FRACTION_TOLERANCE * fraction:
+        warnings.warn(f"The sample fraction is {actual:.3g} instead of {fraction:.3g}: {total} of {len(volumes)} "
+                      f"{'users' if by == 'user' else 'courses'} are selected.")
+
+    # select the same fraction of each stratum
+    rng = np.random.default_rng(seed)
+    weights = {}
+    for stratum in range(n_strata):
+        stratum_keys = volumes.index[strata == stratum].to_numpy()
+        for key in rng.choice(stratum_keys, counts[stratum], replace=False):
+            weights[key] = len(stratum_keys) / counts[stratum]
+
+    sample = df.loc[keys.isin(list(weights))].copy()
+    sample['Sample_weight'] = sample[SAMPLE_KEYS[by]].map(weights).astype('float64')
+
+    return sample.reset_index(drop=True)
+
+
+def estimate_distribution(df: DataFrame, columns: str or [str], weight: str = 'Sample_weight') -> DataFrame:
+    """
+    Estimate the distribution of the full data from a sample (see sample_logs), e.g. the number of logs by
+    Course_Area or by (Component, Role).
+
+    Args:
+        df: The consolidated sample.
+        columns: The field(s) whose distribution is estimated.
+        weight: The field of the sample weights.
+
+    Returns:
+        The estimated number of logs ('Estimated_count') and share ('Estimated_share') of each value, in decreasing
+        order.
+    """
+
+    if isinstance(columns, str):
+        columns = [columns]
+
+    counts = df.groupby(columns, dropna=False)[weight].sum().sort_values(ascending=False)
+    distribution = pd.DataFrame({'Estimated_count': counts.round().astype('int64'),
+                                 'Estimated_share': counts / counts.sum()})
+
+    return distribution
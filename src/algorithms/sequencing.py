@@ -0,0 +1,225 @@
+from src.classes.records import Records
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+
+def _get_values(records: Records, column: str) -> np.ndarray:
+    """
+    Return the values of a column of the records, without decoding the whole store.
+    """
+
+    store = records.get_store()
+    if store is not None:
+        return store.get_column(column)
+
+    return records.get_df()[column].to_numpy()
+
+
+def _get_codes(records: Records, column: str) -> (np.ndarray, np.ndarray):
+    """
+    Return the integer codes of a column of the records and the values indexed by code; missing values have their own
+    code. The codes of a dictionary-encoded store are used as they are.
+    """
+
+    store = records.get_store()
+    if store is not None and store.is_encoded(column):
+        labels = np.append(store.get_dictionary(column), np.nan)
+        codes = np.asarray(store.get_array(column)).astype(np.int64)
+        codes[codes < 0] = len(labels) - 1
+        return codes, labels
+
+    codes, labels = pd.factorize(_get_values(records, column), use_na_sentinel=False)
+
+    return codes.astype(np.int64), np.asarray(labels, dtype=object)
+
+
+def _get_sequences(records: Records, column: str, collapse_repeats: bool) -> dict:
+    """
+    Return the codes of the column sorted by user, course and time (then ID), with the (user, course) group of each
+    position, so that the events of each user in each course are contiguous and in chronological order.
+    """
+
+    user_codes, users = _get_codes(records, 'Username')
+    course_codes, courses = _get_codes(records, 'Course_Area')
+    codes, labels = _get_codes(records, column)
+
+    groups = user_codes * len(courses) + course_codes
+    sort_keys = [_get_values(records, 'Unix_Time'), groups]
+    if 'ID' in records.get_column_names():
+        sort_keys.insert(0, _get_values(records, 'ID'))
+    order = np.lexsort(sort_keys)
+    groups, codes = groups[order], codes[order]
+    times = sort_keys[-2][order]
+
+    if collapse_repeats:
+        # drop the events equal to the previous event of the same group
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (groups[1:] != groups[:-1]) | (codes[1:] != codes[:-1])
+        groups, codes, times = groups[keep], codes[keep], times[keep]
+
+    return {'groups': groups, 'codes': codes, 'labels': labels, 'times': times,
+            'users': users, 'courses': courses, 'n_courses': len(courses)}
+
+
+def _count_rows(matrix: np.ndarray, radix: int) -> (np.ndarray, np.ndarray):
+    """
+    Return the distinct rows of an integer matrix and their counts. The rows are packed into single integers when
+    they fit in 64 bits, which is much faster than comparing the rows.
+    """
+
+    if matrix.shape[1] * np.log2(max(radix, 2)) < 63:
+        keys = np.zeros(len(matrix), dtype=np.int64)
+        for idx in range(matrix.shape[1]):
+            keys = keys * radix + matrix[:, idx]
+        keys, counts = np.unique(keys, return_counts=True)
+        rows = np.empty((len(keys), matrix.shape[1]), dtype=np.int64)
+        for idx in reversed(range(matrix.shape[1])):
+            keys, rows[:, idx] = np.divmod(keys, radix)
+        return rows, counts
+
+    return np.unique(matrix, axis=0, return_counts=True)
+
+
+def get_ngram_counts(records: Records,
+                     column: str = 'Event_name',
+                     n: int = 3,
+                     by_course: bool = False,
+                     collapse_repeats: bool = False,
+                     min_count: int = 1) -> DataFrame:
+    """
+    Count the sequences of n consecutive events of the same user in the same course (e.g. Component -> Component ->
+    Component). The events are sorted by user, course and time, and the n-grams are found by comparing the shifted
+    arrays of the integer-coded columns, without grouping the users.
+
+    Args:
+        records: The records, e.g. selected by extract_records.
+        column: The field of the events, e.g. 'Event_name' or 'Component'.
+        n: The length of the sequences.
+        by_course: If True, the n-grams are counted for each course (Course_Area).
+        collapse_repeats: If True, the consecutive repetitions of the same event are counted once.
+        min_count: The minimum count of the returned n-grams.
+
+    Returns:
+        The n-grams ('Course_Area' if by course, then the fields column_1 ... column_n) and their 'Count', in decreasing
+        order of count.
+    """
+
+    if n < 1:
+        raise ValueError(f"The length of the sequences must be positive: {n}")
+
+    sequences = _get_sequences(records, column, collapse_repeats)
+    groups, codes, labels = sequences['groups'], sequences['codes'], sequences['labels']
+
+    # the n-grams start where the event n - 1 positions later is in the same group
+    starts = np.flatnonzero(groups[:len(groups) - n + 1] == groups[n - 1:])
+    matrix = [codes[starts + idx] for idx in range(n)]
+    radix = len(labels)
+    if by_course:
+        matrix.insert(0, groups[starts] % sequences['n_courses'])
+        radix = max(radix, sequences['n_courses'])
+    rows, counts = _count_rows(np.column_stack(matrix) if len(starts) > 0 else np.empty((0, len(matrix)), np.int64),
+                               radix)
+
+    offset = 1 if by_course else 0
+    ngrams = pd.DataFrame({f'{column}_{idx + 1}': labels[rows[:, idx + offset]] for idx in range(n)})
+    if by_course:
+        ngrams.insert(0, 'Course_Area', sequences['courses'][rows[:, 0]])
+    ngrams['Count'] = counts
+    ngrams = ngrams.loc[ngrams['Count'] >= min_count]
+    ngrams = ngrams.sort_values('Count', ascending=False, kind='stable').reset_index(drop=True)
+
+    return ngrams
+
+
+def get_transition_counts(records: Records,
+                          column: str = 'Component',
+                          by_course: bool = True,
+                          collapse_repeats: bool = False) -> DataFrame:
+    """
+    Count the transitions between consecutive events of the same user in the same course (e.g. Component ->
+    Component), for each course.
+
+    Args:
+        records: The records, e.g. selected by extract_records.
+        column: The field of the events, e.g. 'Component' or 'Event_name'.
+        by_course: If True, the transitions are counted for each course (Course_Area).
+        collapse_repeats: If True, the consecutive repetitions of the same event are counted once (no self-transitions).
+
+    Returns:
+        The transitions ('Course_Area' if by course, 'From', 'To') and their 'Count'.
+    """
+
+    transitions = get_ngram_counts(records, column, 2, by_course, collapse_repeats)
+
+    return transitions.rename(columns={f'{column}_1': 'From', f'{column}_2': 'To'})
+
+
+def get_transition_matrix(records: Records,
+                          column: str = 'Component',
+                          collapse_repeats: bool = False,
+                          normalize: bool = False) -> DataFrame:
+    """
+    Return the transition matrix of the events of the records (select a course with extract_records): the rows are the
+    current events, the columns the next events.
+
+    Args:
+        records: The records, e.g. selected by extract_records.
+        column: The field of the events, e.g. 'Component' or 'Event_name'.
+        collapse_repeats: If True, the consecutive repetitions of the same event are counted once.
+        normalize: If True, each row contains the probabilities of the next events.
+
+    Returns:
+        The matrix of the transition counts (or probabilities).
+    """
+
+    transitions = get_transition_counts(records, column, False, collapse_repeats)
+    matrix = transitions.pivot_table(index='From', columns='To', values='Count', aggfunc='sum', fill_value=0)
+    if normalize:
+        matrix = matrix.div(matrix.sum(axis=1), axis=0)
+
+    return matrix
+
+
+def get_user_sequences(records: Records,
+                       column: str = 'Component',
+                       collapse_repeats: bool = False,
+                       separator: str = None) -> DataFrame:
+    """
+    Export the sequences of events of each user in each course, in chronological order.
+
+    Args:
+        records: The records, e.g. selected by extract_records.
+        column: The field of the events, e.g. 'Component' or 'Event_name'.
+        collapse_repeats: If True, the consecutive repetitions of the same event are kept once.
+        separator: If given, each sequence is returned as a single text, e.g. 'Forum > Quiz > Forum' for ' > ';
+            otherwise one row per event is returned, with its 'Position' in the sequence.
+
+    Returns:
+        The sequences: 'Username', 'Course_Area', then 'Position', the column and 'Unix_Time' (one row per event), or
+        'Length' and 'Sequence' (one row per user and course).
+    """
+
+    sequences = _get_sequences(records, column, collapse_repeats)
+    groups, codes, labels = sequences['groups'], sequences['codes'], sequences['labels']
+
+    # first position of each group
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if len(groups) > 0 else np.empty(0, np.int64)
+    lengths = np.diff(np.r_[starts, len(groups)])
+    users = sequences['users'][groups[starts] // sequences['n_courses']]
+    courses = sequences['courses'][groups[starts] % sequences['n_courses']]
+
+    if separator is None:
+        return pd.DataFrame({'Username': np.repeat(users, lengths),
+                             'Course_Area': np.repeat(courses, lengths),
+                             'Position': np.arange(len(groups)) - np.repeat(starts, lengths),
+                             column: labels[codes],
+                             'Unix_Time': sequences['times']})
+
+    texts = labels.astype(str)
+    events = np.split(codes, starts[1:])
+
+    return pd.DataFrame({'Username': users,
+                         'Course_Area': courses,
+                         'Length': lengths,
+                         'Sequence': [separator.join(texts[group_codes]) for group_codes in events]})
@@ -0,0 +1,255 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.classes.indexed_records import IndexedRecords
+from src.classes.records import Records
+import src.algorithms.extracting as ex
+import src.algorithms.loading as ld
+from urllib.parse import parse_qs, urlencode, urlparse
+from urllib.request import urlopen
+import pandas as pd
+from pandas import DataFrame
+import io
+import json
+import math
+import os
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# number of rows written at a time when streaming the records
+BATCH_SIZE = 65536
+
+# Records methods that can be called through the service
+SUMMARY_METHODS = ['get_column_names', 'get_ids', 'get_times', 'get_usernames', 'get_roles', 'get_courses_areas',
+                   'get_components', 'get_event_names', 'get_years']
+
+
+def _get_filters(query: dict) -> dict:
+    """
+    Return the extract_records parameters given in the query string.
+    """
+
+    filters = {'year': None, 'course_area': None, 'role': None, 'username': None}
+    for parameter in filters:
+        if parameter in query:
+            filters[parameter] = query[parameter]
+    if filters['year'] is not None:
+        filters['year'] = [int(year) for year in filters['year']]
+    filters['course_dates'] = query.get('course_dates', [''])[0]
+
+    return filters
+
+
+def _to_json_values(values) -> list:
+    """
+    Convert the values to JSON serialisable types, replacing missing values with null.
+    """
+
+    values = pd.Series(values).tolist()
+
+    return [None if isinstance(value, float) and math.isnan(value) else value for value in values]
+
+
+def _write_json(df: DataFrame, output: io.BufferedIOBase):
+    """
+    Stream the dataframe in columnar JSON format: {"columns": [...], "data": {column: [values]}}.
+    """
+
+    output.write(('{"columns": ' + json.dumps(list(df.columns)) + ', "data": {').encode())
+    for idx, column in enumerate(df.columns):
+        output.write(((', ' if idx > 0 else '') + json.dumps(column) + ': [').encode())
+        for start in range(0, len(df), BATCH_SIZE):
+            values = json.dumps(_to_json_values(df[column].iloc[start:start + BATCH_SIZE]))[1:-1]
+            output.write(((', ' if start > 0 else '') + values).encode())
+        output.write(b']')
+    output.write(b'}}')
+
+
+def _write_arrow(df: DataFrame, output: io.BufferedIOBase):
+    """
+    Stream the dataframe in the Apache Arrow IPC streaming format.
+    """
+
+    schema = pyarrow.Schema.from_pandas(df, preserve_index=False)
+    with pyarrow.ipc.new_stream(output, schema) as writer:
+        for start in range(0, len(df), BATCH_SIZE):
+            batch = pyarrow.RecordBatch.from_pandas(df.iloc[start:start + BATCH_SIZE], schema=schema,
+                                                    preserve_index=False)
+            writer.write_batch(batch)
+
+
+def _get_summary(summary) -> list or dict:
+    """
+    Convert the result of a Records method to JSON serialisable types.
+    """
+
+    if isinstance(summary, pd.Series):
+        return {str(key): _to_json_values(values) for key, values in summary.items()}
+
+    return _to_json_values(summary)
+
+
+class _RecordsRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answer the requests of the records service:
+        GET /datasets
+        GET /records?dataset=name[&year=...&course_area=...&role=...&username=...&course_dates=...][&format=json|arrow]
+        GET /summary?dataset=name&method=get_usernames[&year=...&course_area=...&role=...&username=...]
+    """
+
+    # the indexed records by dataset name, and the summaries of the whole datasets by (dataset, method), set by
+    # get_service
+    datasets = {}
+    summaries = {}
+
+    def _send_json(self, status: int, content):
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _get_records(self, query: dict) -> Records:
+        records = self.datasets[query['dataset'][0]]
+
+        return ex.extract_records(records, **_get_filters(query))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        try:
+            if url.path == '/datasets':
+                self._send_json(200, {name: len(records.get_df()) for name, records in self.datasets.items()})
+
+            elif url.path == '/records':
+                df = self._get_records(query).get_df()
+                data_format = query.get('format', ['json'])[0]
+                if data_format == 'arrow' and pyarrow is None:
+                    raise ValueError("The arrow format requires the pyarrow package.")
+                if data_format not in ['json', 'arrow']:
+                    raise ValueError(f"Unknown format: {data_format}")
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json' if data_format == 'json'
+                                 else 'application/vnd.apache.arrow.stream')
+                self.end_headers()
+                # the response is streamed and the connection is closed at the end
+                if data_format == 'json':
+                    _write_json(df, self.wfile)
+                else:
+                    _write_arrow(df, self.wfile)
+
+            elif url.path == '/summary':
+                method = query.get('method', [''])[0]
+                if method not in SUMMARY_METHODS:
+                    raise ValueError(f"Unknown method: {method}")
+                filters = _get_filters(query)
+                if all(filters[parameter] is None for parameter in ['year', 'course_area', 'role', 'username']):
+                    # summary of the whole dataset, answered from the index and computed once
+                    key = (query['dataset'][0], method)
+                    if key not in self.summaries:
+                        self.summaries[key] = _get_summary(getattr(self.datasets[key[0]], method)())
+                    summary = self.summaries[key]
+                else:
+                    summary = _get_summary(getattr(self._get_records(query), method)())
+                self._send_json(200, summary)
+
+            else:
+                self._send_json(404, {'error': f"Unknown path: {url.path}"})
+
+        except KeyError as error:
+            self._send_json(400, {'error': f"Missing or unknown value: {error}"})
+        except ValueError as error:
+            self._send_json(400, {'error': str(error)})
+
+
+def get_service(datasets: dict, host: str = '127.0.0.1', port: int = 8000) -> ThreadingHTTPServer:
+    """
+    Create a local HTTP service that holds the consolidated datasets in memory, with prebuilt indexes, and answers
+    extract_records filters and Records summary calls. The results are streamed in a columnar format (JSON, or Apache
+    Arrow if pyarrow is installed), so that repeated queries do not pay the loading and indexing costs.
+
+    Args:
+        datasets: The datasets to serve, by name; each dataset is the path of a consolidated CSV file or store (see
+            storing.write_store), a dataframe or a Records object.
+        host: The address of the service; the service is local by default.
+        port: The port of the service.
+
+    Returns:
+        The service; call serve_forever() to answer the requests.
+    """
+
+    indexed_datasets = {}
+    for name, dataset in datasets.items():
+        if isinstance(dataset, str):
+            dataset = Records.from_store(dataset) if os.path.isdir(dataset) else ld.read_consolidated_data(dataset)
+        if isinstance(dataset, Records):
+            dataset = dataset.get_df()
+        indexed_datasets[name] = IndexedRecords(dataset.reset_index(drop=True))
+
+    handler = type('RecordsRequestHandler', (_RecordsRequestHandler,), {'datasets': indexed_datasets, 'summaries': {}})
+
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve_records(datasets: dict, host: str = '127.0.0.1', port: int = 8000):
+    """
+    Run the records service until interrupted (see get_service).
+
+    Args:
+        datasets: The datasets to serve, by name.
+        host: The address of the service.
+        port: The port of the service.
+    """
+
+    with get_service(datasets, host, port) as service:
+        try:
+            service.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def query_records(url: str,
+                  dataset: str,
+                  year: [int] = None,
+                  course_area: [str] = None,
+                  role: [str] = None,
+                  username: [str] = None,
+                  course_dates: str = "") -> Records:
+    """
+    Return the records selected by the service, with the same parameters as extract_records.
+
+    Args:
+        url: The url of the service (e.g. 'http://127.0.0.1:8000').
+        dataset: The name of the dataset.
+        year: list of int,
+            Year of the course/area.
+        course_area: list of str,
+            Course(s) or area(s) of the platform.
+        role: list of str,
+            'Student', 'Teacher', 'Manager', etc.
+        username: list of str,
+            The username of the user.
+        course_dates: str,
+            The path of the data extracted from the database, as seen by the service.
+
+    Returns:
+        The object of the class Records.
+    """
+
+    parameters = [('dataset', dataset), ('format', 'arrow' if pyarrow is not None else 'json')]
+    for name, values in [('year', year), ('course_area', course_area), ('role', role), ('username', username)]:
+        parameters += [(name, value) for value in values or []]
+    if course_dates != '':
+        parameters.append(('course_dates', course_dates))
+
+    with urlopen(url + '/records?' + urlencode(parameters)) as response:
+        if pyarrow is not None:
+            df = pyarrow.ipc.open_stream(response).read_pandas()
+        else:
+            content = json.load(response)
+            df = pd.DataFrame(content['data'], columns=content['columns'])
+
+    return Records(df)
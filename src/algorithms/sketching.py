@@ -0,0 +1,155 @@
+from src.classes.records import Records
+from src.classes.sketches import Sketches
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+
+# group keys of the sketches; 'Day' is the date of the 'Time' field
+SKETCH_KEYS = ['Year', 'Course_Area', 'Role', 'Day']
+
+# precision of the sketches: 4096 registers per sketch, 1.6% of standard error
+DEFAULT_PRECISION = 12
+
+# number of rows processed at a time
+CHUNK_SIZE = 1000000
+
+
+def get_precision(error: float) -> int:
+    """
+    Return the smallest sketch precision whose relative standard error does not exceed the given error (e.g. 0.01 for
+    1%). The memory of each sketch is 2^precision bytes.
+
+    Args:
+        error: The relative standard error, between 0.002 and 0.26.
+
+    Returns:
+        The precision of the sketches.
+    """
+
+    precision = int(np.ceil(np.log2((1.04 / error) ** 2)))
+    if not 4 <= precision <= 18:
+        raise ValueError(f"The error must be between 0.002 and 0.26: {error}")
+
+    return precision
+
+
+def _get_columns(keys: [str], column: str) -> [str]:
+    """
+    Return the fields to read to compute the keys and the values of the sketches.
+    """
+
+    columns = [key for key in keys if key != 'Day'] + [column]
+    if 'Day' in keys:
+        columns.append('Time')
+
+    return columns
+
+
+def _get_keys(df: DataFrame, keys: [str]) -> DataFrame:
+    """
+    Return the group keys of the records, adding the day if needed.
+    """
+
+    if 'Day' in keys and 'Day' not in df.columns:
+        df = df.assign(Day=pd.to_datetime(df['Time'].str.slice(0, 10), format='%d/%m/%Y'))
+
+    return df[keys]
+
+
+def _get_chunks(data: str or DataFrame or Records, columns: [str], chunk_size: int):
+    """
+    Yield the fields of the records by chunks of rows.
+    """
+
+    if isinstance(data, str):
+        yield from pd.read_csv(data, usecols=columns, chunksize=chunk_size)
+        return
+
+    store = data.get_store() if isinstance(data, Records) else None
+    if store is not None:
+        for start in range(0, len(store), chunk_size):
+            yield store.to_frame(np.arange(start, min(start + chunk_size, len(store))), columns)
+        return
+
+    df = data.get_df() if isinstance(data, Records) else data
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size][columns]
+
+
+def get_sketches(data: str or DataFrame or Records,
+                 keys: [str] = None,
+                 column: str = 'Username',
+                 precision: int = DEFAULT_PRECISION,
+                 chunk_size: int = CHUNK_SIZE) -> Sketches:
+    """
+    Build the HyperLogLog sketches of the distinct users of each (Year, Course_Area, Role, Day). The records are
+    processed by chunks whose sketches are merged into the running sketches, so that the memory does not depend on the
+    size of the data, and the sketches can be merged with those of other data (e.g. the new logs of a dashboard
+    refresh) and aggregated on fewer keys (see count_distinct).
+
+    Args:
+        data: The path of a consolidated CSV file, the consolidated dataframe or a Records object.
+        keys: The group keys; SKETCH_KEYS by default.
+        column: The field whose distinct values are counted.
+        precision: The precision of the sketches (see get_precision).
+        chunk_size: The number of rows processed at a time.
+
+    Returns:
+        The Sketches object.
+    """
+
+    if keys is None:
+        keys = SKETCH_KEYS
+
+    sketches = None
+    for chunk in _get_chunks(data, _get_columns(keys, column), chunk_size):
+        chunk_sketches = Sketches.from_values(_get_keys(chunk, keys), chunk[column].to_numpy(), precision)
+        sketches = chunk_sketches if sketches is None else sketches.update(chunk_sketches)
+
+    if sketches is None:
+        sketches = Sketches.from_values(pd.DataFrame(columns=keys), np.array([], dtype=object), precision)
+
+    # sort the groups by their keys
+    return sketches.aggregate(keys)
+
+
+def count_distinct(data: str or DataFrame or Records or Sketches,
+                   by: [str] = None,
+                   column: str = 'Username',
+                   approximate: bool = True,
+                   precision: int = DEFAULT_PRECISION) -> Series:
+    """
+    Count the distinct users of each group, e.g. by (Course_Area, Day) for a dashboard. The approximate counts are
+    estimated with HyperLogLog sketches (see get_sketches), which can be built once and aggregated on any subset of
+    their keys; the exact counts group all the records.
+
+    Args:
+        data: The path of a consolidated CSV file, the consolidated dataframe, a Records object, or the sketches
+            returned by get_sketches.
+        by: The group keys, among 'Year', 'Course_Area', 'Role' and 'Day' (or the keys of the sketches); by default,
+            the users are counted over all the records.
+        column: The field whose distinct values are counted.
+        approximate: If False, the exact counts are computed (not available for sketches).
+        precision: The precision of the sketches (see get_precision).
+
+    Returns:
+        The number of distinct users, indexed by the group keys.
+    """
+
+    if by is None:
+        by = []
+
+    if isinstance(data, Sketches):
+        if not approximate:
+            raise ValueError("The exact counts require the records, not their sketches.")
+        return data.aggregate(by).estimate()
+
+    if approximate:
+        return get_sketches(data, by, column, precision).aggregate(by).estimate()
+
+    # exact counts
+    df = pd.concat(_get_chunks(data, _get_columns(by, column), CHUNK_SIZE))
+    if len(by) == 0:
+        return pd.Series([df[column].nunique()], name=column)
+
+    return df[column].groupby([_get_keys(df, by)[key] for key in by], dropna=False).nunique()
@@ -0,0 +1,87 @@
+from src.classes.store import Store
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+import json
+import os
+import shutil
+
+
+def _get_code_type(length: int) -> np.dtype:
+    """
+    Return the smallest signed integer type for the codes of a dictionary of the given length.
+    """
+
+    for code_type in [np.int8, np.int16, np.int32]:
+        if length < np.iinfo(code_type).max:
+            return np.dtype(code_type)
+
+    return np.dtype(np.int64)
+
+
+def write_store(df: DataFrame, path: str) -> Store:
+    """
+    Save the dataframe in the binary format of the Store class, so that it can be opened via memory mapping by several
+    processes (see Records.from_store). The store is a directory that contains:
+        - columns.json: the number of rows and, for each column, its name, type and files;
+        - a .npy file for each column: the fixed-width values of numeric and boolean columns, the integer codes (-1
+          for missing values) of the other columns;
+        - a .json file for each dictionary-encoded column: its distinct values, indexed by code.
+    An existing store at the same path is replaced, but any other file or directory at the path is left untouched and
+    an error is raised.
+
+    Args:
+        df: The dataframe object.
+        path: The path of the store directory.
+
+    Returns:
+        The opened store.
+    """
+
+    if os.path.exists(path) and not os.path.isfile(os.path.join(path, 'columns.json')):
+        raise ValueError(f"The path exists and is not a store: {path}")
+
+    # write into a temporary directory, then replace the store at once
+    temporary_path = path.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(temporary_path, ignore_errors=True)
+    os.makedirs(temporary_path)
+
+    columns = []
+    for idx, column in enumerate(df.columns):
+        values = df[column]
+        metadata = {'name': column, 'dtype': str(values.dtype), 'file': f'column_{idx}.npy'}
+        if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biufcmM':
+            # fixed-width values
+            metadata['encoding'] = 'plain'
+            np.save(os.path.join(temporary_path, metadata['file']), values.to_numpy())
+        else:
+            # dictionary encoding
+            metadata['encoding'] = 'dictionary'
+            metadata['dictionary'] = f'column_{idx}.json'
+            codes, dictionary = pd.factorize(values)
+            np.save(os.path.join(temporary_path, metadata['file']), codes.astype(_get_code_type(len(dictionary))))
+            with open(os.path.join(temporary_path, metadata['dictionary']), 'w') as file:
+                json.dump(pd.Series(dictionary, dtype=object).tolist(), file)
+        columns.append(metadata)
+
+    with open(os.path.join(temporary_path, 'columns.json'), 'w') as file:
+        json.dump({'length': len(df), 'columns': columns}, file)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.rename(temporary_path, path)
+
+    return Store(path)
+
+
+def open_store(path: str) -> Store:
+    """
+    Open a store via memory mapping.
+
+    Args:
+        path: The path of the store directory.
+
+    Returns:
+        The opened store.
+    """
+
+    return Store(path)
@@ -1,7 +1,22 @@
 from pandas import DataFrame
+import src.algorithms.backends as bk
 import src.algorithms.timing as tm
 
 
+# names of the columns of the platform logs and of the database data in the consolidated dataframe
+COLUMN_NAMES = {'User full name': 'Username',
+                'Affected user': 'Affected_user',
+                'Event context': 'Event_context',
+                'Event name': 'Event_name',
+                'IP address': 'IP_address',
+                'id': 'ID',
+                'timecreated': 'Unix_Time',
+                'eventname': 'Event_class',
+                'component': 'Event_component',
+                'action': 'Event_action',
+                'target': 'Event_target'}
+
+
 def rename_columns(df: DataFrame) -> DataFrame:
     """
     Rename the colum names.
@@ -15,14 +30,45 @@ def rename_columns(df: DataFrame) -> DataFrame:
     """
 
     # rename columns
-    df.rename(columns={'User full name': 'Username',
-                       'Affected user': 'Affected_user',
-                       'Event context': 'Event_context',
-                       'Event name': 'Event_name',
-                       'IP address': 'IP_address',
-                       'id': 'ID',
-                       'timecreated': 'Unix_Time'},
-              inplace=True)
+    df.rename(columns=COLUMN_NAMES, inplace=True)
+
+    return df
+
+
+def get_source_columns(columns: [str]) -> [str]:
+    """
+    Return the names that the given columns of the consolidated dataframe have in the platform logs and in the
+    database data.
+
+    Args:
+        columns: The column names in the consolidated dataframe (e.g. 'Username').
+
+    Returns:
+        The original column names (e.g. 'User full name'), together with the given names.
+    """
+
+    source_names = {name: source_name for source_name, name in COLUMN_NAMES.items()}
+    source_columns = [source_names[column] for column in columns if column in source_names]
+
+    return source_columns + list(columns)
+
+
+def drop_unused_columns(df: DataFrame, columns: [str]) -> DataFrame:
+    """
+    Drop the columns that are not in the given list, so that the memory is released as soon as a column is no longer
+    needed.
+
+    Args:
+        df: The dataframe object, of any backend (see backends.get_frame_backend).
+        columns: The columns to keep.
+
+    Returns:
+        The dataframe without the unused columns.
+    """
+
+    unused_columns = [column for column in df.columns if column not in columns]
+    if len(unused_columns) > 0:
+        df = bk.get_frame_backend(df).drop_columns(df, unused_columns)
 
     return df
 
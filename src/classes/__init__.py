@@ -1,3 +1,18 @@
-__all__ = ['Records']
+__all__ = ['IndexedRecords', 'Records', 'Sketches', 'Store']
 
-from .records import *
+import importlib
+
+# the classes are imported on first access, so that importing the package does not load pandas
+_CLASSES = {'IndexedRecords': '.indexed_records', 'Records': '.records', 'Sketches': '.sketches',
+            'Store': '.store'}
+
+
+def __getattr__(name: str):
+    if name in _CLASSES:
+        return getattr(importlib.import_module(_CLASSES[name], __name__), name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> [str]:
+    return sorted(set(globals()) | set(__all__))
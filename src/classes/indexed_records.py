@@ -0,0 +1,62 @@
+from src.classes.records import Records
+import numpy as np
+
+
+class IndexedRecords(Records):
+    """
+    Records whose filter fields ('Year', 'Course_Area', 'Role', 'Username') are indexed once, so that repeated
+    selections (see extracting.extract_records) are answered by looking up the row positions of the selected values
+    instead of scanning the whole dataframe.
+    """
+
+    INDEXED_COLUMNS = ['Year', 'Course_Area', 'Role', 'Username']
+
+    def __init__(self, df):
+        super().__init__(df)
+        # row positions of each value of the indexed fields
+        self._index = {column: df.groupby(column, sort=False).indices
+                       for column in self.INDEXED_COLUMNS if column in df.columns}
+        # indexed fields having missing values, which are not indexed
+        self._missing = {column: df[column].isnull().any() for column in self._index}
+
+    def _get_unique(self, column: str):
+        """
+        Return the unique values of the column, from the index for the indexed fields
+        """
+        if column not in self._index:
+            return super()._get_unique(column)
+
+        values = list(self._index[column])
+        if self._missing[column]:
+            return np.array(values + [np.nan], dtype=object)
+
+        return np.array(values, dtype=self._df[column].dtype)
+
+    def get_positions(self, filters: dict) -> np.ndarray:
+        """
+        Return the sorted row positions of the records whose fields take one of the given values.
+
+        Args:
+            filters: The list of values by field, e.g. {'Year': [2023], 'Role': ['Student']}; fields whose value is
+                None are not filtered.
+
+        Returns:
+            The array of row positions.
+        """
+
+        positions = None
+        for column, values in filters.items():
+            if values is None:
+                continue
+            index = self._index[column]
+            # positions of the rows having one of the values
+            column_positions = [index[value] for value in values if value in index]
+            column_positions = np.sort(np.concatenate(column_positions)) if len(column_positions) > 0 \
+                else np.array([], dtype=np.int64)
+            positions = column_positions if positions is None \
+                else np.intersect1d(positions, column_positions, assume_unique=True)
+
+        if positions is None:
+            positions = np.arange(len(self._df))
+
+        return positions
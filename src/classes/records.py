@@ -1,3 +1,4 @@
+from src.classes.store import Store
 from pandas import DataFrame, Series
 
 
@@ -5,21 +6,55 @@ class Records(object):
     """
     The dataframe of the Records object has the following fields:
     'ID', 'Time', 'Username', 'Role', 'Course_Area', 'Component', 'Event_name', 'Year', 'Unix_Time'
+
+    The records can also be backed by a memory-mapped store (see from_store): the dataframe is then decoded only when
+    requested, and the other methods read the stored columns directly.
     """
 
-    def __init__(self, df):
+    def __init__(self, df, store: Store = None):
         self._df = df
+        self._store = store
+
+    @classmethod
+    def from_store(cls, path: str):
+        """
+        Return the records saved in the store at the given path (see storing.write_store), opened via memory mapping
+        """
+        return cls(None, Store(path))
+
+    def get_store(self) -> Store:
+        """
+        Return the store, if the records are backed by a store whose dataframe has not been decoded
+        """
+        store = self._store if self._df is None else None
+
+        return store
 
     def get_df(self) -> DataFrame:
         """
         Return the dataframe
         """
+        if self._df is None:
+            self._df = self._store.to_frame()
+
         return self._df
 
+    def _get_unique(self, column: str):
+        """
+        Return the unique values of the column
+        """
+        if self._df is None:
+            return self._store.get_unique(column)
+
+        return self._df[column].unique()
+
     def get_column_names(self) -> []:
         """
         Return the dataframe column names
         """
+        if self._df is None:
+            return self._store.get_column_names()
+
         column_names = list(self._df.columns)
 
         return column_names
@@ -28,7 +63,7 @@ class Records(object):
         """
         Return a sorted list of record ids
         """
-        ids = sorted(self._df.ID)
+        ids = sorted(self._df.ID if self._df is not None else self._store.get_column('ID'))
 
         return ids
 
@@ -36,7 +71,7 @@ class Records(object):
         """
         Return a list of record times
         """
-        ids = self._df.Time.unique()
+        ids = self._get_unique('Time')
 
         return ids
 
@@ -44,7 +79,7 @@ class Records(object):
         """
         Return a sorted list of record usernames
         """
-        usernames = sorted(self._df.Username.unique())
+        usernames = sorted(self._get_unique('Username'))
 
         return usernames
 
@@ -52,7 +87,7 @@ class Records(object):
         """
         Return a list of record roles
         """
-        roles = sorted(self._df.Role.unique())
+        roles = sorted(self._get_unique('Role'))
 
         return roles
 
@@ -60,7 +95,7 @@ class Records(object):
         """
         Return the sorted list of the dataframe courses and areas
         """
-        courses_and_areas = sorted(self._df.Course_Area.unique())
+        courses_and_areas = sorted(self._get_unique('Course_Area'))
 
         return courses_and_areas
 
@@ -68,7 +103,7 @@ class Records(object):
         """
         Return a sorted list of (role-filtered) record components
         """
-        components = sorted(self._df.Component.unique())
+        components = sorted(self._get_unique('Component'))
 
         return components
 
@@ -76,7 +111,8 @@ class Records(object):
         """
         Return the series by component of the sorted list of all the event names
         """
-        event_names = self._df.sort_values('Event_name', ascending=True).groupby('Component')['Event_name'].unique()
+        df = self._df if self._df is not None else self._store.to_frame(columns=['Component', 'Event_name'])
+        event_names = df.sort_values('Event_name', ascending=True).groupby('Component')['Event_name'].unique()
 
         return event_names
 
@@ -84,6 +120,6 @@ class Records(object):
         """
         Return a list of record years
         """
-        years = sorted(self._df.Year.unique())
+        years = sorted(self._get_unique('Year'))
 
         return years
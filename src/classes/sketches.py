@@ -0,0 +1,294 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+
+# number of dense sketches whose estimates are computed at a time
+ESTIMATE_ROWS = 256
+
+
+class Sketches(object):
+    """
+    HyperLogLog sketches of the distinct values (e.g. the usernames) of groups of records (e.g. by course and day).
+    Each sketch is a fixed array of 2^precision small registers, whatever the number of values, and estimates the
+    number of distinct values with a relative standard error of about 1.04 / sqrt(2^precision) (1.6% for the precision
+    12). The sketches of the same values are mergeable: the sketch of the union of several groups (e.g. the days of a
+    year, or the chunks of a file) is the maximum of their registers, so counts can be aggregated without the values.
+
+    As in HyperLogLog++, the sketch of a group with few values (e.g. the users of a course on a day) is sparse: only
+    its non-zero registers are kept, and it becomes dense once it has more than 2^precision / 16 of them.
+
+    The group keys are the rows of a dataframe. The dense registers are the rows of a matrix of 2^precision columns,
+    and the sparse registers are the pairs (cell, rank), where the cell is group * 2^precision + register; the new
+    sparse registers are kept aside and reduced (the maximum rank of each cell) once they are numerous enough.
+    """
+
+    def __init__(self, keys: DataFrame, precision: int = 12):
+        self._keys = keys.reset_index(drop=True)
+        self._precision = precision
+        # row of the dense registers of each group, -1 for the sparse sketches
+        self._rows = np.full(len(self._keys), -1, dtype=np.int64)
+        self._dense = np.zeros((0, 1 << precision), dtype=np.uint8)
+        self._n_dense = 0
+        # reduced and new sparse registers
+        self._cells, self._ranks = np.array([], dtype=np.int64), np.array([], dtype=np.uint8)
+        self._new = []
+        self._n_new = 0
+
+    @classmethod
+    def from_values(cls, keys: DataFrame, values: np.ndarray, precision: int = 12):
+        """
+        Return the sketches of the values of each group, e.g. the usernames of each (Year, Course_Area, Role, Day);
+        the rows of keys are the group keys of the values. Missing values are not counted.
+        """
+        if not 4 <= precision <= 18:
+            raise ValueError(f"The precision must be between 4 and 18: {precision}")
+
+        values = pd.Series(values, dtype=object)
+        present = values.notnull().to_numpy()
+        keys, values = keys.loc[present].reset_index(drop=True), values[present]
+
+        # 64-bit hashes of the values: the first bits select the register, the others give the rank of the first 1 bit
+        hashes = pd.util.hash_array(values.to_numpy())
+        positions = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+        ranks = _count_leading_zeros(hashes << np.uint64(precision))
+        ranks = np.minimum(ranks, 64 - precision) + 1
+
+        groups, group_keys = _get_groups(keys, sort=True)
+        sketches = cls(group_keys, precision)
+        sketches._add_registers(groups * (1 << precision) + positions, ranks.astype(np.uint8))
+        sketches._reduce()
+
+        return sketches
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _make_dense(self, groups: np.ndarray):
+        """
+        Make the sketches of the groups dense; their sparse registers are moved by the next reduction
+        """
+        groups = np.unique(groups[self._rows[groups] < 0])
+        if len(groups) == 0:
+            return
+
+        if self._n_dense + len(groups) > len(self._dense):
+            dense = np.zeros((max(self._n_dense + len(groups), len(self._dense) * 3 // 2), self._dense.shape[1]),
+                             dtype=np.uint8)
+            dense[:self._n_dense] = self._dense[:self._n_dense]
+            self._dense = dense
+        self._rows[groups] = np.arange(self._n_dense, self._n_dense + len(groups))
+        self._n_dense += len(groups)
+
+    def _add_dense(self, groups: np.ndarray, registers: np.ndarray, rows: np.ndarray):
+        """
+        Merge the rows of the registers into the sketches of the groups; several rows can be merged into the same group
+        """
+        if len(groups) == 0:
+            return
+        self._make_dense(groups)
+
+        order = np.argsort(groups, kind='stable')
+        starts = np.flatnonzero(np.r_[True, np.diff(groups[order]) != 0])
+        lengths = np.diff(np.r_[starts, len(groups)])
+        targets = self._rows[groups[order[starts]]]
+
+        # merge the k-th row of each group, the longest groups first (np.maximum.reduceat is much slower on the rows of
+        # a matrix)
+        longest = np.argsort(-lengths, kind='stable')
+        for k in range(lengths.max()):
+            merged = longest[:np.searchsorted(-lengths[longest], -k, side='left')]
+            self._dense[targets[merged]] = np.maximum(self._dense[targets[merged]],
+                                                      registers[rows[order[starts[merged] + k]]])
+
+    def _add_registers(self, cells: np.ndarray, ranks: np.ndarray):
+        """
+        Merge the sparse registers into the sketches
+        """
+        self._new.append((cells, ranks))
+        self._n_new += len(cells)
+        # reduced once they outnumber the reduced registers, so that each register is sorted a few times at most
+        if self._n_new > max(len(self._cells), 1 << self._precision):
+            self._reduce()
+
+    def _reduce(self):
+        """
+        Keep the maximum rank of each sparse register, and move the registers of the dense sketches to their rows
+        """
+        if len(self._new) == 0:
+            return
+
+        cells = np.concatenate([self._cells] + [cells for cells, _ in self._new])
+        ranks = np.concatenate([self._ranks] + [ranks for _, ranks in self._new])
+        self._new, self._n_new = [], 0
+        if len(cells) > 0:
+            order = np.argsort(cells, kind='stable')
+            cells, ranks = cells[order], ranks[order]
+            starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+            cells, ranks = cells[starts], np.maximum.reduceat(ranks, starts)
+
+        # the sparse sketches having too many registers become dense
+        groups = cells >> self._precision
+        counts = np.bincount(groups[self._rows[groups] < 0], minlength=len(self._keys))
+        self._make_dense(np.flatnonzero(counts > (1 << self._precision) // 16))
+
+        dense = self._rows[groups] >= 0
+        rows, positions = self._rows[groups[dense]], cells[dense] & ((1 << self._precision) - 1)
+        self._dense[rows, positions] = np.maximum(self._dense[rows, positions], ranks[dense])
+        self._cells, self._ranks = cells[~dense], ranks[~dense]
+
+    def _merge_into(self, sketches, groups: np.ndarray):
+        """
+        Merge each sketch into the sketch of the given group of the other sketches
+        """
+        self._reduce()
+        dense_groups = np.flatnonzero(self._rows >= 0)
+        sketches._add_dense(groups[dense_groups], self._dense, self._rows[dense_groups])
+        positions = self._cells & ((1 << self._precision) - 1)
+        sketches._add_registers((groups[self._cells >> self._precision] << self._precision) | positions, self._ranks)
+
+    def _check(self, other):
+        if other.get_precision() != self._precision:
+            raise ValueError("Only sketches of the same precision can be merged.")
+        if list(other.get_keys().columns) != list(self._keys.columns):
+            raise ValueError("Only sketches of the same keys can be merged.")
+
+    def get_keys(self) -> DataFrame:
+        """
+        Return the group keys of the sketches
+        """
+        return self._keys
+
+    def get_registers(self) -> np.ndarray:
+        """
+        Return the registers of the sketches as a dense matrix, one row per group (2^precision bytes per group)
+        """
+        self._reduce()
+        registers = np.zeros((len(self._keys), 1 << self._precision), dtype=np.uint8)
+        dense_groups = np.flatnonzero(self._rows >= 0)
+        registers[dense_groups] = self._dense[self._rows[dense_groups]]
+        registers[self._cells >> self._precision, self._cells & ((1 << self._precision) - 1)] = self._ranks
+
+        return registers
+
+    def get_precision(self) -> int:
+        """
+        Return the precision of the sketches
+        """
+        return self._precision
+
+    def get_error(self) -> float:
+        """
+        Return the relative standard error of the estimates
+        """
+        error = 1.04 / np.sqrt(1 << self._precision)
+
+        return error
+
+    def aggregate(self, by: [str]):
+        """
+        Return the sketches of the groups sharing the values of the given keys (e.g. ['Course_Area'] to count the
+        distinct users of each course over all the years, roles and days), by merging their registers
+        """
+        groups, keys = _get_groups(self._keys[by], sort=True)
+        sketches = Sketches(keys, self._precision)
+        self._merge_into(sketches, groups)
+        sketches._reduce()
+
+        return sketches
+
+    def merge(self, other):
+        """
+        Return the union of the sketches of two sets of records (e.g. two chunks of a file): the sketches of the same
+        groups are merged
+        """
+        self._check(other)
+
+        groups, keys = _get_groups(pd.concat([self._keys, other.get_keys()], ignore_index=True), sort=True)
+        sketches = Sketches(keys, self._precision)
+        self._merge_into(sketches, groups[:len(self._keys)])
+        other._merge_into(sketches, groups[len(self._keys):])
+        sketches._reduce()
+
+        return sketches
+
+    def update(self, other):
+        """
+        Merge the sketches of other records (e.g. the next chunk of a file) into these sketches, in place: the sketches
+        of the same groups are merged, and the new groups are added after the others
+        """
+        self._check(other)
+
+        # the groups of these sketches keep their numbers, since their keys are unique and come first
+        n_groups = len(self._keys)
+        groups, keys = _get_groups(pd.concat([self._keys, other.get_keys()], ignore_index=True), sort=False)
+        self._keys = keys
+        self._rows = np.r_[self._rows, np.full(len(keys) - n_groups, -1, dtype=np.int64)]
+        other._merge_into(self, groups[n_groups:])
+
+        return self
+
+    def estimate(self) -> Series:
+        """
+        Return the estimated number of distinct values of each group, indexed by the group keys
+        """
+        self._reduce()
+        m = 1 << self._precision
+        powers = np.ldexp(1.0, -np.arange(66))
+
+        # sparse sketches: the zero registers count 2^0 each
+        groups = self._cells >> self._precision
+        zeros = m - np.bincount(groups, minlength=len(self._keys))
+        sums = zeros + np.bincount(groups, weights=powers[self._ranks], minlength=len(self._keys)).astype(np.float64)
+
+        # dense sketches, by blocks of rows, from the histograms of their register values
+        dense_groups = np.flatnonzero(self._rows >= 0)
+        for start in range(0, len(dense_groups), ESTIMATE_ROWS):
+            block_groups = dense_groups[start:start + ESTIMATE_ROWS]
+            block = self._dense[self._rows[block_groups]] + 66 * np.arange(len(block_groups))[:, np.newaxis]
+            histograms = np.bincount(block.ravel(), minlength=66 * len(block_groups)).reshape(-1, 66)
+            sums[block_groups] = histograms @ powers
+            zeros[block_groups] = histograms[:, 0]
+
+        alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        estimates = alpha * m * m / sums
+
+        # linear counting for small cardinalities
+        small = (estimates <= 2.5 * m) & (zeros > 0)
+        estimates[small] = m * np.log(m / zeros[small])
+
+        if len(self._keys.columns) == 0:
+            return pd.Series(estimates, name='Estimate')
+
+        return pd.Series(estimates, index=pd.MultiIndex.from_frame(self._keys) if len(self._keys.columns) > 1
+                         else pd.Index(self._keys.iloc[:, 0]), name='Estimate')
+
+
+def _get_groups(keys: DataFrame, sort: bool) -> (np.ndarray, DataFrame):
+    """
+    Return the group number of each row of keys and the keys of the groups, in the order of the numbers.
+    """
+
+    if len(keys.columns) == 0:
+        # a single group
+        return np.zeros(len(keys), dtype=np.int64), pd.DataFrame(index=[0])
+
+    grouped = keys.groupby(list(keys.columns), sort=sort, dropna=False)
+
+    return grouped.ngroup().to_numpy().astype(np.int64), grouped.size().index.to_frame(index=False)
+
+
+def _count_leading_zeros(values: np.ndarray) -> np.ndarray:
+    """
+    Return the number of leading zero bits of 64-bit unsigned integers.
+    """
+
+    values = values.copy()
+    counts = np.zeros(len(values), dtype=np.int64)
+    for bits in [32, 16, 8, 4, 2, 1]:
+        # the values whose first bits are zero
+        zero = values < np.uint64(1 << (64 - bits))
+        counts[zero] += bits
+        values[zero] <<= np.uint64(bits)
+    counts[values == 0] = 64
+
+    return counts
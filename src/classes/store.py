@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+import json
+import os
+
+
+class Store(object):
+    """
+    Consolidated data saved in binary format (see storing.write_store) and opened via memory mapping: processes
+    opening the same store share the same physical pages, and only the accessed rows and columns are read from disk.
+    Numeric columns are fixed-width arrays; the other columns are dictionary-encoded, i.e. stored as integer codes
+    (-1 for missing values) plus the list of their distinct values, and they are decoded only when needed.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        with open(os.path.join(path, 'columns.json')) as file:
+            metadata = json.load(file)
+        self._length = metadata['length']
+        self._columns = {column['name']: column for column in metadata['columns']}
+        # memory-mapped arrays, opened on first access
+        self._arrays = {}
+        self._dictionaries = {}
+
+    def __len__(self) -> int:
+        return self._length
+
+    def get_column_names(self) -> []:
+        """
+        Return the column names
+        """
+        column_names = list(self._columns)
+
+        return column_names
+
+    def is_encoded(self, column: str) -> bool:
+        """
+        Return True if the column is dictionary-encoded
+        """
+        encoded = self._columns[column]['encoding'] == 'dictionary'
+
+        return encoded
+
+    def get_array(self, column: str) -> np.ndarray:
+        """
+        Return the memory-mapped array of the column: the values of numeric columns or the codes of dictionary-encoded
+        columns
+        """
+        if column not in self._arrays:
+            self._arrays[column] = np.load(os.path.join(self._path, self._columns[column]['file']), mmap_mode='r')
+
+        return self._arrays[column]
+
+    def get_dictionary(self, column: str) -> np.ndarray:
+        """
+        Return the distinct values of a dictionary-encoded column, indexed by code
+        """
+        if column not in self._dictionaries:
+            with open(os.path.join(self._path, self._columns[column]['dictionary'])) as file:
+                values = json.load(file)
+            dictionary = np.empty(len(values), dtype=object)
+            dictionary[:] = values
+            self._dictionaries[column] = dictionary
+
+        return self._dictionaries[column]
+
+    def get_mask(self, filters: dict) -> np.ndarray:
+        """
+        Return the mask of the rows whose fields take one of the given values, e.g. {'Year': [2023],
+        'Role': ['Student']}; fields whose value is None are not filtered. The values of dictionary-encoded columns are
+        translated into codes, so the columns are not decoded.
+        """
+        mask = np.ones(self._length, dtype=bool)
+        for column, values in filters.items():
+            if values is None:
+                continue
+            if self.is_encoded(column):
+                dictionary = self.get_dictionary(column)
+                values = np.flatnonzero(np.isin(dictionary, np.array(list(values), dtype=object)))
+            mask &= np.isin(self.get_array(column), values)
+
+        return mask
+
+    def get_unique(self, column: str) -> np.ndarray:
+        """
+        Return the distinct non-missing values of the column, in order of appearance
+        """
+        values = pd.unique(np.asarray(self.get_array(column)))
+        if self.is_encoded(column):
+            values = self.get_dictionary(column)[values[values >= 0]]
+
+        return values
+
+    def get_column(self, column: str, positions: np.ndarray = None) -> np.ndarray:
+        """
+        Return the decoded values of the column, for the given row positions or for all the rows
+        """
+        array = self.get_array(column)
+        array = np.asarray(array) if positions is None else array[positions]
+        if not self.is_encoded(column):
+            return array
+
+        # decode the values, missing values are NaN
+        dictionary = self.get_dictionary(column)
+        if len(dictionary) == 0:
+            # all the values are missing
+            return np.full(len(array), np.nan, dtype=object)
+        values = dictionary[array]
+        values[array < 0] = np.nan
+
+        return values
+
+    def to_frame(self, positions: np.ndarray = None, columns: [str] = None) -> DataFrame:
+        """
+        Return the decoded dataframe, for the given row positions (which become the index) and columns, or for all the
+        rows and columns
+        """
+        if columns is None:
+            columns = self.get_column_names()
+
+        df = pd.DataFrame({column: self.get_column(column, positions) for column in columns},
+                          index=positions, columns=columns)
+        for column in columns:
+            # restore the data types of the dictionary-encoded columns (e.g. 'Int64')
+            dtype = self._columns[column]['dtype']
+            if self.is_encoded(column) and dtype != 'object':
+                df[column] = df[column].astype(dtype)
+
+        return df
@@ -1,4 +1,4 @@
-# logs
+# logs (a list of paths if the platform logs are exported in several files)
 PLATFORM_LOGS_PATH = 'src/datasets/example_platform_logs.csv'
 DATABASE_DATA_PATH = 'src/datasets/example_database_data.csv'
 
@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+import src.paths as paths
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def example_inputs() -> dict:
+    """
+    The example datasets, as the input parameters of get_consolidated_data.
+    """
+
+    inputs = {'platform_logs': paths.PLATFORM_LOGS_PATH,
+              'database_data': paths.DATABASE_DATA_PATH,
+              'course_shortnames': paths.COURSE_SHORTNAMES_PATH,
+              'student_role': paths.STUDENT_ROLE_PATH,
+              'teacher_role': paths.TEACHER_ROLE_PATH,
+              'non_editing_teacher_role': paths.NON_EDITING_TEACHER_ROLE_PATH,
+              'course_creator_role': paths.COURSE_CREATOR_ROLE_PATH,
+              'manager_role': paths.MANAGER_ROLE_PATH,
+              'admin_role': paths.ADMIN_ROLE_PATH,
+              'deleted_users': paths.DELETED_USERS_PATH}
+
+    # the paths of the example datasets are relative to the root of the repository
+    return {name: os.path.join(ROOT, path) if path != '' else '' for name, path in inputs.items()}
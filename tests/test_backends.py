@@ -0,0 +1,129 @@
+import csv
+from datetime import datetime, timezone
+
+import pytest
+from pandas.testing import assert_frame_equal
+
+from main import get_consolidated_data
+
+# start of the synthetic logs, one log per minute
+START = 1610611200
+
+# synthetic logs triggering the rules of each integration stage: user id, affected user, event context, component,
+# event name, event class, course id, related user id
+SYNTHETIC_LOGS = [
+    (5, '-', 'System', 'System', 'User has logged in', '\\core\\event\\user_loggedin', 0, None),
+    (5, '-', 'System', 'System', 'Web service function called', '\\core\\event\\webservice_function_called', 0, None),
+    (5, '-', 'Front page', 'System', 'Course viewed', '\\core\\event\\course_viewed', 1, None),
+    (5, '-', 'Course: Name course 24', 'System', 'Course viewed', '\\core\\event\\course_viewed', 24, None),
+    (5, '-', 'Quiz: test', 'Quiz', 'Course module viewed', '\\mod_quiz\\event\\course_module_viewed', 24, None),
+    (5, 'User 5', 'URL: link', 'System', 'Course activity completion updated',
+     '\\core\\event\\course_module_completion_updated', 24, 5),
+    (6, '-', 'Other', 'System', 'Course module created', '\\core\\event\\course_module_created', 36, None),
+    (6, '-', 'Quiz test', 'Quiz', 'Course module viewed', '\\mod_quiz\\event\\course_module_viewed', 36, None),
+    (5, 'User 6', 'User: User 5', 'System', 'Message sent', '\\core\\event\\message_sent', 0, 6),
+    (5, '-', 'Chat: room', 'Chat', 'Message sent', '\\mod_chat\\event\\message_sent', 24, None),
+    (5, 'User 6', 'User: User 5', 'System', 'Message contact added', '\\core\\event\\message_contact_added', 0, 6),
+    (5, 'User 5', 'User: User 5', 'System', 'User profile viewed', '\\core\\event\\user_profile_viewed', 0, 5),
+    (5, 'User 6', 'User: User 6', 'System', 'User profile viewed', '\\core\\event\\user_profile_viewed', 0, 6),
+    (5, 'User 6', 'System', 'System', 'Blog entries viewed', '\\core\\event\\blog_entries_viewed', 0, 6),
+    (5, '-', 'User: User 5', 'System', 'Dashboard viewed', '\\core\\event\\dashboard_viewed', 0, None),
+    (5, '-', 'System', 'System', 'Tag added to an item', '\\core\\event\\tag_added', 0, None),
+    # events that are not in the catalogue
+    (5, '-', 'Course: Name course 24', 'Local', 'Some plugin event', '\\local_x\\event\\thing_done', 24, None),
+    (5, '-', 'Course: Name course 24', 'Local', 'Calendar synchronised', '\\local_x\\event\\calendar_synced', 24, None),
+    (7, '-', 'Course: Name course 24', 'System', 'Course viewed', '\\core\\event\\course_viewed', 24, None),
+    (53, '-', 'System', 'System', 'User has logged in', '\\core\\event\\user_loggedin', 0, None),
+]
+
+
+def _write_csv(path, rows) -> str:
+    with open(path, 'w', newline='') as file:
+        csv.writer(file).writerows(rows)
+
+    return str(path)
+
+
+@pytest.fixture(params=[True, False], ids=['event_classes', 'event_names'])
+def synthetic_inputs(request, tmp_path) -> dict:
+    """
+    Small datasets triggering the rules of each integration stage, with or without the event classes of the database
+    logs, as the input parameters of get_consolidated_data.
+    """
+
+    times = [START + 60 * row for row in range(len(SYNTHETIC_LOGS))]
+    # the platform logs are exported from the most recent
+    platform_logs = [[datetime.fromtimestamp(time, timezone.utc).strftime('%d/%m/%y, %H:%M'), f'User {user}',
+                      affected_user, context, component, name, f"The user with id '{user}' did something.", 'web',
+                      '0.0.0.0']
+                     for time, (user, affected_user, context, component, name, _, _, _)
+                     in reversed(list(zip(times, SYNTHETIC_LOGS)))]
+    database_data = [[row + 1, user, course, '\\N' if related_user is None else related_user, time, event_class,
+                      event_class.split('\\')[1], 'done', 'thing']
+                     for row, (time, (user, _, _, _, _, event_class, course, related_user))
+                     in enumerate(zip(times, SYNTHETIC_LOGS))]
+    columns = ['id', 'userid', 'courseid', 'relateduserid', 'timecreated', 'eventname', 'component', 'action', 'target']
+    if not request.param:
+        database_data = [row[:5] for row in database_data]
+        columns = columns[:5]
+
+    return {'platform_logs': _write_csv(tmp_path / 'platform_logs.csv',
+                                        [['Time', 'User full name', 'Affected user', 'Event context', 'Component',
+                                          'Event name', 'Description', 'Origin', 'IP address']] + platform_logs),
+            'database_data': _write_csv(tmp_path / 'database_data.csv', [columns] + database_data),
+            'course_shortnames': _write_csv(tmp_path / 'course_shortnames.csv',
+                                            [['shortname', 'id'], ['Name course 24', 24], ['Name course 36', 36]]),
+            # user 5 is a student of the course 24 for 10 minutes, then a teacher; user 7 enrols after their log
+            'student_role': _write_csv(tmp_path / 'student_role.csv',
+                                       [['courseid', 'userid', 'timestart', 'timeend'], [24, 5, START, START + 600],
+                                        [24, 7, START + 3600, 0], [36, 6, 0, 0]]),
+            'teacher_role': _write_csv(tmp_path / 'teacher_role.csv',
+                                       [['courseid', 'userid', 'timestart', 'timeend'], [24, 5, START + 600, 0]]),
+            'manager_role': _write_csv(tmp_path / 'manager_role.csv', [['userid'], [53]])}
+
+
+def test_polars_backend_matches_pandas_backend(example_inputs):
+    pytest.importorskip('polars')
+
+    expected = get_consolidated_data(**example_inputs, backend='pandas')
+    result = get_consolidated_data(**example_inputs, backend='polars')
+
+    assert len(expected) > 0
+    assert_frame_equal(result, expected)
+
+
+def test_polars_backend_matches_pandas_backend_on_all_rules(synthetic_inputs):
+    pytest.importorskip('polars')
+
+    expected = get_consolidated_data(**synthetic_inputs, backend='pandas')
+    result = get_consolidated_data(**synthetic_inputs, backend='polars')
+
+    assert_frame_equal(result, expected)
+    # the rules of each stage were applied
+    assert list(expected['Course_Area'].iloc[:4]) == ['Authentication', 'Mobile', 'Moodle Site', 'Name course 24']
+    assert list(expected['Course_Area'].iloc[[8, 9, 12, 13]]) == ['Social interaction', 'Name course 24', 'Profile',
+                                                                  'Social interaction']
+    assert list(expected['Component'].iloc[[2, 3, 5, 6, 8, 9, 17]]) == ['Site home', 'Course home', 'URL', 'Other',
+                                                                        'Messaging', 'Chat', 'Calendar']
+    assert list(expected['Status'].iloc[5:8]) == ['Available', 'DELETED', 'DELETED']
+    # the users of the contact added are swapped
+    assert list(expected.loc[10, ['Username', 'userid']]) == ['User 6', 6]
+    # the course roles are bounded by the enrolment periods
+    assert list(expected['Role'].iloc[[3, 16, 18, 19]]) == ['Student', 'Teacher', 'Guest', 'Manager']
+
+
+def test_unknown_backend(example_inputs):
+    with pytest.raises(ValueError):
+        get_consolidated_data(**example_inputs, backend='spark')
+
+
+@pytest.mark.parametrize('backend', ['pandas', 'polars'])
+def test_empty_shard(example_inputs, backend):
+    if backend == 'polars':
+        pytest.importorskip('polars')
+
+    expected = get_consolidated_data(**example_inputs, backend='pandas')
+    result = get_consolidated_data(**example_inputs, backend=backend, years=[2024])
+
+    assert len(result) == 0
+    assert_frame_equal(result, expected.iloc[:0])
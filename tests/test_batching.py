@@ -0,0 +1,99 @@
+import json
+import os
+import time
+
+import pytest
+
+import src.algorithms.batching as bt
+
+
+def _write_manifest(path, manifest) -> str:
+    with open(path, 'w') as file:
+        json.dump(manifest, file)
+
+    return str(path)
+
+
+def test_manifest_merges_defaults(tmp_path):
+    manifest = {'defaults': {'inputs': {'platform_logs': 'logs.csv'}, 'parameters': {'backend': 'polars'},
+                             'format': 'sqlite'},
+                'jobs': [{'name': 'a', 'inputs': {'database_data': 'a.csv'}, 'parameters': {'columns': ['Time']},
+                          'output': 'a.sqlite', 'split': {'years': [2022, 2023]}},
+                         {'name': 'b', 'parameters': {'backend': 'pandas'}, 'output': 'b.csv', 'format': 'csv'}]}
+    jobs = bt.read_manifest(_write_manifest(tmp_path / 'manifest.json', manifest))
+
+    assert [job['name'] for job in jobs] == ['a_2022', 'a_2023', 'b']
+    assert jobs[0]['inputs'] == {'platform_logs': 'logs.csv', 'database_data': 'a.csv'}
+    assert jobs[0]['parameters'] == {'backend': 'polars', 'columns': ['Time']}
+    assert jobs[0]['format'] == 'sqlite' and jobs[0]['output'] == 'a_2022.sqlite'
+    assert jobs[2]['parameters'] == {'backend': 'pandas'}
+    assert jobs[2]['format'] == 'csv'
+
+
+def test_manifest_rejects_unknown_fields(tmp_path):
+    manifest = {'defaults': {'backend': 'polars'}, 'jobs': [{'name': 'a', 'output': 'a.csv'}]}
+    with pytest.raises(ValueError, match='backend'):
+        bt.read_manifest(_write_manifest(tmp_path / 'manifest.json', manifest))
+
+
+def _run(job) -> int:
+    # record the run, then fail for the broken jobs
+    with open(job['log'], 'a') as file:
+        file.write(job['name'] + '\n')
+    if job['broken']:
+        raise RuntimeError(f"{job['name']} is broken")
+
+    return len(job['name'])
+
+
+def test_batch_runs_each_job_once(tmp_path):
+    log = str(tmp_path / 'runs.log')
+    jobs = [{'name': f'job_{number}', 'log': log, 'broken': number == 3} for number in range(8)]
+    progress = bt.run_batch(jobs, str(tmp_path / 'queue'), _run, processes=4, poll_interval=0.05)
+
+    with open(log) as file:
+        runs = file.read().split()
+    # the jobs that succeed are run once, the broken job max_attempts times
+    assert sorted(runs) == sorted([job['name'] for job in jobs] + ['job_3'] * (bt.MAX_ATTEMPTS - 1))
+    assert list(progress['state']) == ['done'] * 3 + ['failed'] + ['done'] * 4
+    assert list(progress['attempts']) == [1] * 3 + [bt.MAX_ATTEMPTS] + [1] * 4
+    assert 'job_3 is broken' in progress.loc['job_3', 'error']
+    # the locks are released
+    assert sorted(path.name for path in (tmp_path / 'queue').iterdir()) == [f'{job["name"]}.json' for job in jobs]
+
+
+def test_stale_lock_is_reclaimed(tmp_path):
+    queue_dir = str(tmp_path)
+    token = bt.claim_job(queue_dir, 'job', stale_timeout=60)
+    assert token is not None
+    # the lock is held by a live worker
+    assert bt.claim_job(queue_dir, 'job', stale_timeout=60) is None
+
+    # the worker died long ago
+    lock_path = tmp_path / 'job.lock'
+    os.utime(lock_path, (time.time() - 120, time.time() - 120))
+    new_token = bt.claim_job(queue_dir, 'job', stale_timeout=60)
+    assert new_token not in [None, token]
+    assert lock_path.read_text() == new_token
+
+    # the dead worker does not release the lock of the new one
+    bt.release_job(queue_dir, 'job', token)
+    assert lock_path.exists()
+    bt.release_job(queue_dir, 'job', new_token)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_batch_resumes_the_job_of_a_dead_worker(tmp_path):
+    queue_dir, log = tmp_path / 'queue', str(tmp_path / 'runs.log')
+    queue_dir.mkdir()
+    # a worker died while running the job
+    (queue_dir / 'job.json').write_text(json.dumps({'state': 'running', 'attempts': 1}))
+    (queue_dir / 'job.lock').write_text('dead')
+    os.utime(queue_dir / 'job.lock', (time.time() - 120, time.time() - 120))
+
+    progress = bt.run_batch([{'name': 'job', 'log': log, 'broken': False}], str(queue_dir), _run, processes=2,
+                            stale_timeout=60, poll_interval=0.05)
+
+    assert progress.loc['job', 'state'] == 'done' and progress.loc['job', 'attempts'] == 2
+    with open(log) as file:
+        assert file.read().split() == ['job']
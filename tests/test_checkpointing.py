@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+from pandas.testing import assert_frame_equal
+
+import src.algorithms.integrating as it
+from main import get_consolidated_data
+
+
+def _fail(df):
+    raise RuntimeError("interrupted")
+
+
+def test_resume_after_failure(example_inputs, tmp_path, monkeypatch):
+    expected = get_consolidated_data(**example_inputs)
+    (tmp_path / 'notes.txt').write_text('keep')
+
+    # the run fails after add_year, whose checkpoint has an all-missing Course_Area
+    with monkeypatch.context() as patch:
+        patch.setattr(it, 'redefine_course_area', _fail)
+        with pytest.raises(RuntimeError):
+            get_consolidated_data(**example_inputs, checkpoint_dir=str(tmp_path))
+    with open(tmp_path / 'manifest.json') as file:
+        assert json.load(file)['stage'] == 'add_year'
+
+    # the second run resumes from the checkpoint: the logs are not joined again
+    monkeypatch.setattr(it, 'get_joined_logs', _fail)
+    result = get_consolidated_data(**example_inputs, checkpoint_dir=str(tmp_path))
+
+    assert_frame_equal(result, expected)
+    assert sorted(os.listdir(tmp_path)) == ['notes.txt']
+
+
+def test_unreadable_checkpoint_starts_over(example_inputs, tmp_path, monkeypatch):
+    expected = get_consolidated_data(**example_inputs)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(it, 'redefine_course_area', _fail)
+        with pytest.raises(RuntimeError):
+            get_consolidated_data(**example_inputs, checkpoint_dir=str(tmp_path))
+    # corrupt the saved stage
+    with open(tmp_path / 'add_year' / 'columns.json', 'w') as file:
+        file.write('{')
+
+    result = get_consolidated_data(**example_inputs, checkpoint_dir=str(tmp_path))
+
+    assert_frame_equal(result, expected)
+    assert os.listdir(tmp_path) == []
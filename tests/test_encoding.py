@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from src.algorithms.encoding import UNKNOWN_EVENT, encode_events, get_event_codes
+
+
+def test_missing_event_classes():
+    # '\N' values of the database dump are read as 0
+    df = pd.DataFrame({'Event_name': ['User has logged in', 'Course viewed', 'Custom event'],
+                       'Event_class': [0, '\\core\\event\\course_viewed', 0],
+                       'Event_component': [0, 'core', 0],
+                       'Component': ['System', 'System', 'Chat']})
+
+    df = encode_events(df)
+
+    assert df['Event_code'].tolist() == get_event_codes('User has logged in', 'Course viewed') + [UNKNOWN_EVENT]
+    assert df['Event_component'].tolist() == ['core', 'core', 'mod_chat']
+
+
+def test_missing_event_names():
+    df = pd.DataFrame({'Event_name': [np.nan], 'Event_class': [np.nan]})
+
+    assert encode_events(df)['Event_code'].tolist() == [UNKNOWN_EVENT]
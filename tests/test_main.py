@@ -0,0 +1,17 @@
+import filecmp
+
+import pytest
+
+from main import main
+
+
+# the example logs are too few to sample half of them
+@pytest.mark.filterwarnings('ignore:The sample fraction')
+def test_consolidate_is_the_default_command(example_inputs, tmp_path):
+    options = [argument for name, path in example_inputs.items() if path != ''
+               for argument in ['--' + name.replace('_', '-'), path]]
+    options += ['--sample', '0.5']
+
+    assert main(options + ['-o', str(tmp_path / 'default.csv')]) == 0
+    assert main(['consolidate'] + options + ['-o', str(tmp_path / 'consolidate.csv')]) == 0
+    assert filecmp.cmp(tmp_path / 'default.csv', tmp_path / 'consolidate.csv', shallow=False)
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from main import get_consolidated_data
+from src.algorithms.sampling import sample_logs
+
+
+def test_sample_size_and_weights():
+    df = pd.DataFrame({'courseid': np.repeat(np.arange(6), [1, 2, 3, 4, 5, 6]), 'userid': 1})
+
+    with pytest.warns(UserWarning):
+        sample = sample_logs(df, 0.1, 'course')
+
+    assert sample['courseid'].nunique() == 1
+    assert sample['Sample_weight'].unique().tolist() == [6.0]
+
+
+def test_empty_logs():
+    sample = sample_logs(pd.DataFrame({'courseid': [], 'userid': []}, dtype='int64'), 0.5)
+
+    assert len(sample) == 0
+    assert sample['Sample_weight'].dtype == 'float64'
+
+
+def test_empty_shard(example_inputs):
+    df = get_consolidated_data(**example_inputs, years=[2024], sample=0.5)
+
+    assert len(df) == 0
+    assert 'Sample_weight' in df.columns
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from src.algorithms.storing import write_store
+from src.classes.store import Store
+
+
+def test_round_trip_with_missing_values(tmp_path):
+    df = pd.DataFrame({'Year': [2023, 2023, 2024],
+                       'Course_Area': [np.nan, np.nan, np.nan],
+                       'Role': ['Student', np.nan, 'Teacher'],
+                       'courseid': pd.array([2, None, 3], dtype='Int64'),
+                       'Affected_user': pd.Series([np.nan] * 3, dtype=object)})
+
+    write_store(df, str(tmp_path / 'store'))
+    result = Store(str(tmp_path / 'store')).to_frame()
+
+    assert_frame_equal(result, df)
+    assert_frame_equal(Store(str(tmp_path / 'store')).to_frame(np.array([2]), ['Course_Area', 'Role']),
+                       df.loc[[2], ['Course_Area', 'Role']])
+
+
+def test_existing_store_is_replaced(tmp_path):
+    write_store(pd.DataFrame({'Role': ['Student']}), str(tmp_path / 'store'))
+    write_store(pd.DataFrame({'Role': ['Teacher', 'Manager']}), str(tmp_path / 'store'))
+
+    assert Store(str(tmp_path / 'store')).to_frame()['Role'].tolist() == ['Teacher', 'Manager']
+
+
+def test_other_directory_is_not_replaced(tmp_path):
+    (tmp_path / 'important.txt').write_text('keep')
+
+    with pytest.raises(ValueError):
+        write_store(pd.DataFrame({'Role': ['Student']}), str(tmp_path))
+
+    assert (tmp_path / 'important.txt').read_text() == 'keep'